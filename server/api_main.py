@@ -1,18 +1,28 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date
 from contextlib import asynccontextmanager
+import asyncio
 import httpx
 import uuid
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 
-from database import get_db, User, Interview, init_db
+from database import get_db, get_read_db_for, read_session_factory, pin_user_to_primary, User, Interview, init_db
 from auth import create_access_token, get_current_user, TokenData, TokenResponse
+from progress import record_progress, load_progress, backfill_progress_if_empty, BUCKETS
+from export import stream_interviews, MEDIA_TYPES
+from rate_limit import limit_per_user, limit_per_ip, db_admission
+from rankings import (
+    record_score, load_histogram, percentile, top_buckets,
+    rebuild_histograms_periodically
+)
 
 # Lifespan event for startup/shutdown
 @asynccontextmanager
@@ -20,8 +30,20 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting Nexus API...")
     init_db()
+    from database import db_available, SessionLocal
+    background_tasks = []
+    if db_available:
+        # Before serving, so no interview is both backfilled and recorded live
+        try:
+            if await asyncio.to_thread(backfill_progress_if_empty, SessionLocal):
+                print("✅ Progress rollups backfilled from existing interviews")
+        except Exception as e:
+            print(f"⚠️ Progress backfill failed, run python progress.py: {e}")
+        background_tasks.append(asyncio.create_task(rebuild_histograms_periodically(SessionLocal)))
     yield
     # Shutdown
+    for task in background_tasks:
+        task.cancel()
     print("👋 Shutting down Nexus API...")
 
 # Initialize FastAPI app
@@ -29,7 +51,8 @@ app = FastAPI(
     title="Nexus Mock Interview API",
     description="Backend API for AI-powered mock interviews",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -71,6 +94,40 @@ class InterviewResponse(BaseModel):
     weaknesses: List[str]
     suggestions: List[str]
 
+# Read-only database dependency for GET endpoints: replica unless the user just wrote
+def get_read_db(current_user: TokenData = Depends(get_current_user)):
+    yield from get_read_db_for(current_user.user_id)
+
+# Columns needed to build an InterviewResponse. Querying these directly skips
+# loading the transcript and building full ORM objects for list pages.
+INTERVIEW_RESPONSE_COLUMNS = (
+    Interview.id,
+    Interview.date,
+    Interview.duration,
+    Interview.topic,
+    Interview.score,
+    Interview.strengths,
+    Interview.weaknesses,
+    Interview.suggestions,
+)
+
+def interview_to_dict(row) -> dict:
+    """Map an interview row to the InterviewResponse shape without re-validation.
+
+    orjson serializes UUID, datetime and list values natively, so the row's
+    values are passed through as-is rather than copied or converted.
+    """
+    return {
+        "id": row.id,
+        "date": row.date,
+        "duration": row.duration,
+        "topic": row.topic,
+        "score": row.score,
+        "strengths": row.strengths,
+        "weaknesses": row.weaknesses,
+        "suggestions": row.suggestions,
+    }
+
 # Health check endpoint (no database required)
 @app.get("/health")
 async def health_check():
@@ -85,7 +142,11 @@ async def root():
 
 # ==================== AUTH ENDPOINTS ====================
 
-@app.post("/auth/google", response_model=TokenResponse)
+@app.post(
+    "/auth/google",
+    response_model=TokenResponse,
+    dependencies=[Depends(limit_per_ip("auth_google", per_minute=20, burst=10)), Depends(db_admission)]
+)
 async def google_auth(
     auth_request: GoogleAuthRequest,
     db: Session = Depends(get_db)
@@ -117,24 +178,31 @@ async def google_auth(
         user = None
         
         if db is not None:
-            # Check if user exists
-            user = db.query(User).filter(User.google_id == google_id).first()
-            
-            if user:
-                # Update last login
-                user.last_login = datetime.utcnow()
-                db.commit()
-            else:
-                # Create new user
-                user = User(
-                    google_id=google_id,
-                    email=email,
-                    name=name,
-                    picture_url=picture
-                )
-                db.add(user)
-                db.commit()
-                db.refresh(user)
+            from sqlalchemy import func
+
+            # Create or update the user and stamp last_login in one round trip.
+            # Concurrent first sign-ins from two devices both land on the same row.
+            stmt = insert(User).values(
+                google_id=google_id,
+                email=email,
+                name=name,
+                picture_url=picture,
+                last_login=datetime.utcnow()
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[User.google_id],
+                set_={
+                    # Tokens without a name or picture keep the stored ones
+                    "name": func.coalesce(stmt.excluded.name, User.name),
+                    "picture_url": func.coalesce(stmt.excluded.picture_url, User.picture_url),
+                    "last_login": stmt.excluded.last_login
+                }
+            ).returning(User.id, User.email, User.name, User.picture_url)
+
+            user = db.execute(stmt).one()
+            db.commit()
+            # The app calls /auth/me next; a lagging replica may not have a new user yet
+            pin_user_to_primary(str(user.id))
         else:
             # Mock user for no-db mode
             user = type('User', (), {
@@ -173,10 +241,14 @@ async def google_auth(
             detail=f"Authentication failed: {str(e)}"
         )
 
-@app.get("/auth/me", response_model=UserResponse)
+@app.get(
+    "/auth/me",
+    response_model=UserResponse,
+    dependencies=[Depends(limit_per_user("auth_me", per_minute=60, burst=20)), Depends(db_admission)]
+)
 async def get_current_user_info(
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get current authenticated user's information"""
     if db is None:
@@ -197,18 +269,21 @@ async def get_current_user_info(
             detail="User not found"
         )
     
-    return UserResponse(
-        id=str(user.id),
-        email=user.email,
-        name=user.name,
-        picture_url=user.picture_url,
-        created_at=user.created_at
-    )
+    return ORJSONResponse({
+        "id": user.id,
+        "email": user.email,
+        "name": user.name,
+        "picture_url": user.picture_url,
+        "created_at": user.created_at
+    })
 
 # ==================== INTERVIEW ENDPOINTS ====================
 
-@app.post("/api/interviews", response_model=InterviewResponse)
-@app.post("/api/interviews", response_model=InterviewResponse)
+@app.post(
+    "/api/interviews",
+    response_model=InterviewResponse,
+    dependencies=[Depends(limit_per_user("create_interview", per_minute=10, burst=5)), Depends(db_admission)]
+)
 async def create_interview(
     interview: InterviewCreate,
     current_user: TokenData = Depends(get_current_user),
@@ -228,8 +303,10 @@ async def create_interview(
             suggestions=interview.suggestions
         )
 
+    now = datetime.utcnow()
     new_interview = Interview(
         user_id=current_user.user_id,
+        date=now,
         duration=interview.duration,
         topic=interview.topic,
         transcript=interview.transcript,
@@ -240,24 +317,22 @@ async def create_interview(
     )
     
     db.add(new_interview)
+    record_score(db, interview.topic, interview.score)
+    record_progress(db, current_user.user_id, interview.topic, now, interview.score)
     db.commit()
     db.refresh(new_interview)
+    pin_user_to_primary(current_user.user_id)
     
-    return InterviewResponse(
-        id=str(new_interview.id),
-        date=new_interview.date,
-        duration=new_interview.duration,
-        topic=new_interview.topic,
-        score=new_interview.score,
-        strengths=new_interview.strengths,
-        weaknesses=new_interview.weaknesses,
-        suggestions=new_interview.suggestions
-    )
+    return ORJSONResponse(interview_to_dict(new_interview))
 
-@app.get("/api/interviews", response_model=List[InterviewResponse])
+@app.get(
+    "/api/interviews",
+    response_model=List[InterviewResponse],
+    dependencies=[Depends(limit_per_user("list_interviews", per_minute=120, burst=30)), Depends(db_admission)]
+)
 async def get_user_interviews(
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = 50,
     offset: int = 0
 ):
@@ -265,32 +340,67 @@ async def get_user_interviews(
     if db is None:
         return []
 
-    interviews = db.query(Interview)\
+    interviews = db.query(*INTERVIEW_RESPONSE_COLUMNS)\
         .filter(Interview.user_id == current_user.user_id)\
         .order_by(Interview.date.desc())\
         .limit(limit)\
         .offset(offset)\
         .all()
     
-    return [
-        InterviewResponse(
-            id=str(i.id),
-            date=i.date,
-            duration=i.duration,
-            topic=i.topic,
-            score=i.score,
-            strengths=i.strengths,
-            weaknesses=i.weaknesses,
-            suggestions=i.suggestions
+    return ORJSONResponse([interview_to_dict(i) for i in interviews])
+
+# Declared before /api/interviews/{interview_id} so "export" isn't read as an ID
+@app.get(
+    "/api/interviews/export",
+    dependencies=[Depends(limit_per_user("export_interviews", per_minute=2, burst=2))]
+)
+async def export_interviews(
+    current_user: TokenData = Depends(get_current_user),
+    format: str = "ndjson",
+    gzip: bool = False
+):
+    """Stream the user's full interview history, including transcripts"""
+    if format not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format: {format}"
+        )
+
+    from database import db_available
+    if not db_available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Export unavailable (DB unavailable)"
         )
-        for i in interviews
-    ]
 
-@app.get("/api/interviews/{interview_id}", response_model=InterviewResponse)
+    # Take the admission slot here, while a busy server can still answer 503. The stream
+    # releases it when it ends; the background task covers a body that never starts.
+    release = db_admission.acquire()
+
+    # gzip is the file format, not a transfer encoding, so clients save the .gz as-is
+    filename = f"interviews.{format}.gz" if gzip else f"interviews.{format}"
+    return StreamingResponse(
+        stream_interviews(
+            read_session_factory(current_user.user_id),
+            current_user.user_id,
+            format,
+            gzip,
+            release=release
+        ),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        background=BackgroundTask(release)
+    )
+
+@app.get(
+    "/api/interviews/{interview_id}",
+    response_model=InterviewResponse,
+    dependencies=[Depends(limit_per_user("get_interview", per_minute=120, burst=30)), Depends(db_admission)]
+)
 async def get_interview(
     interview_id: str,
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get specific interview details"""
     if db is None:
@@ -299,7 +409,7 @@ async def get_interview(
             detail="Interview not found (DB unavailable)"
         )
 
-    interview = db.query(Interview)\
+    interview = db.query(*INTERVIEW_RESPONSE_COLUMNS)\
         .filter(
             Interview.id == interview_id,
             Interview.user_id == current_user.user_id
@@ -312,21 +422,15 @@ async def get_interview(
             detail="Interview not found"
         )
     
-    return InterviewResponse(
-        id=str(interview.id),
-        date=interview.date,
-        duration=interview.duration,
-        topic=interview.topic,
-        score=interview.score,
-        strengths=interview.strengths,
-        weaknesses=interview.weaknesses,
-        suggestions=interview.suggestions
-    )
+    return ORJSONResponse(interview_to_dict(interview))
 
-@app.get("/api/stats")
+@app.get(
+    "/api/stats",
+    dependencies=[Depends(limit_per_user("stats", per_minute=60, burst=20)), Depends(db_admission)]
+)
 async def get_user_stats(
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get user statistics"""
     if db is None:
@@ -350,6 +454,90 @@ async def get_user_stats(
         "last_interview": stats.last_interview
     }
 
+@app.get(
+    "/api/progress",
+    dependencies=[Depends(limit_per_user("progress", per_minute=60, burst=20)), Depends(db_admission)]
+)
+async def get_user_progress(
+    current_user: TokenData = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    bucket: str = "day",
+    topic: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+):
+    """Get the user's average score per day or week, optionally for one topic"""
+    if bucket not in BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported bucket: {bucket}"
+        )
+
+    if db is None:
+        return {"bucket": bucket, "topic": topic, "points": []}
+
+    return {
+        "bucket": bucket,
+        "topic": topic,
+        "points": load_progress(db, current_user.user_id, bucket, topic, start, end)
+    }
+
+# ==================== RANKING ENDPOINTS ====================
+
+@app.get(
+    "/api/rankings/{topic}",
+    dependencies=[Depends(limit_per_user("rankings", per_minute=60, burst=20)), Depends(db_admission)]
+)
+async def get_topic_ranking(
+    topic: str,
+    current_user: TokenData = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Get where the user's best score on a topic ranks among all users"""
+    if db is None:
+        return {"topic": topic, "best_score": None, "percentile": None, "top_percent": None}
+
+    from sqlalchemy import func
+
+    best_score = db.query(func.max(Interview.score))\
+        .filter(
+            Interview.user_id == current_user.user_id,
+            Interview.topic == topic
+        )\
+        .scalar()
+
+    if best_score is None:
+        return {"topic": topic, "best_score": None, "percentile": None, "top_percent": None}
+
+    rank = percentile(load_histogram(db, topic), best_score)
+    return {
+        "topic": topic,
+        "best_score": best_score,
+        "percentile": rank,
+        "top_percent": round(100 - rank, 2) if rank is not None else None
+    }
+
+@app.get(
+    "/api/leaderboard/{topic}",
+    dependencies=[Depends(limit_per_user("leaderboard", per_minute=60, burst=20)), Depends(db_admission)]
+)
+async def get_topic_leaderboard(
+    topic: str,
+    n: int = 10,
+    current_user: TokenData = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Get the highest score buckets covering the top N interviews on a topic"""
+    if db is None:
+        return {"topic": topic, "total_interviews": 0, "top": []}
+
+    histogram = load_histogram(db, topic)
+    return {
+        "topic": topic,
+        "total_interviews": sum(histogram),
+        "top": top_buckets(histogram, n)
+    }
+
 # Run with: uvicorn main:app --reload
 if __name__ == "__main__":
     import uvicorn
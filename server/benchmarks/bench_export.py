@@ -0,0 +1,149 @@
+"""
+Benchmark: peak RSS and throughput of the streaming interview export.
+
+Needs a PostgreSQL DATABASE_URL in .env (a scratch database, not production).
+Seeds one synthetic user with N interviews, then exports them through
+stream_interviews and through the old approach of paging GET /api/interviews
+style queries into ORM objects, printing peak RSS growth and rows/second.
+
+Peak RSS is a process-wide high-water mark, so each variant runs in its own
+subprocess and reports its peak above the RSS it had before exporting. It is
+read from VmHWM (Linux), because ru_maxrss carries the parent's peak across
+fork and exec.
+
+Run with: python benchmarks/bench_export.py [interviews]
+"""
+
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from sqlalchemy import insert
+
+import database
+from database import Interview, init_db
+from export import EXPORT_COLUMNS, stream_interviews
+
+INTERVIEWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+TRANSCRIPT = "Interviewer: Tell me about a system you designed.\nCandidate: ..." * 40
+
+
+def peak_rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024  # kB
+    return 0.0
+
+
+def seed(user_id: str):
+    db = database.SessionLocal()
+    try:
+        for start in range(0, INTERVIEWS, 1000):
+            db.execute(insert(Interview), [
+                {
+                    "user_id": user_id,
+                    "duration": 1800,
+                    "topic": "System Design",
+                    "transcript": TRANSCRIPT,
+                    "score": 50 + (i % 50),
+                    "strengths": ["Structure", "Communication"],
+                    "weaknesses": ["Estimation"],
+                    "suggestions": ["Practice capacity planning"],
+                }
+                for i in range(start, min(start + 1000, INTERVIEWS))
+            ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def cleanup(user_id: str):
+    db = database.SessionLocal()
+    try:
+        db.query(Interview).filter(Interview.user_id == user_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_export(user_id: str, fmt: str, compress: bool):
+    total = 0
+    for chunk in stream_interviews(database.SessionLocal, user_id, fmt, compress):
+        total += len(chunk)
+    return total
+
+
+def run_paginated(user_id: str, page_size: int = 50):
+    """One request per page, as a client paging GET /api/interviews would; each page is encoded and dropped."""
+    total = 0
+    offset = 0
+    while True:
+        db = database.SessionLocal()
+        try:
+            page = db.query(Interview)\
+                .filter(Interview.user_id == user_id)\
+                .order_by(Interview.date.desc())\
+                .limit(page_size)\
+                .offset(offset)\
+                .all()
+            body = orjson.dumps([
+                {column.key: getattr(row, column.key) for column in EXPORT_COLUMNS}
+                for row in page
+            ])
+        finally:
+            db.close()
+        if not page:
+            break
+        total += len(body)
+        offset += page_size
+    return total
+
+
+VARIANTS = {
+    "stream ndjson": lambda user_id: run_export(user_id, "ndjson", False),
+    "stream ndjson+gzip": lambda user_id: run_export(user_id, "ndjson", True),
+    "stream csv": lambda user_id: run_export(user_id, "csv", False),
+    "offset pages (ORM)": run_paginated,
+}
+
+
+def run_variant(label: str, user_id: str):
+    """Run one variant in this (fresh) process and print its line."""
+    init_db()
+    # Warm up the connection pool so it isn't counted against the export
+    database.SessionLocal().close()
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    result = VARIANTS[label](user_id)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>20}: {INTERVIEWS / elapsed:>9.0f} rows/s  "
+          f"peak RSS +{peak_rss_mb() - before:.1f} MB  ({result} bytes)", flush=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3 and sys.argv[2] == "--variant":
+        run_variant(sys.argv[3], sys.argv[4])
+        sys.exit(0)
+
+    init_db()
+    if not database.db_available:
+        print("A PostgreSQL DATABASE_URL is required for this benchmark.")
+        sys.exit(1)
+
+    user_id = str(uuid.uuid4())
+    print(f"Seeding {INTERVIEWS} interviews...")
+    seed(user_id)
+    try:
+        for label in VARIANTS:
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), str(INTERVIEWS), "--variant", label, user_id],
+                check=True
+            )
+    finally:
+        cleanup(user_id)
@@ -0,0 +1,111 @@
+"""
+Benchmark: sign-in throughput and DB round trips, old flow vs upsert.
+
+Needs a PostgreSQL DATABASE_URL in .env (a scratch database, not production).
+Replays N sign-ins spread over a pool of users, first with the old
+SELECT + UPDATE/INSERT + commit + refresh flow, then with the single
+INSERT ... ON CONFLICT ... RETURNING used by /auth/google, which also
+sets last_login. Round trips are counted per statement sent to the
+server, including COMMITs. The old flow costs four either way: SELECT,
+UPDATE or INSERT, COMMIT, and the SELECT that reloads the expired user
+when its id is read after the commit.
+
+Run with: python benchmarks/bench_login.py [logins] [users]
+"""
+
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, func
+from sqlalchemy.dialects.postgresql import insert
+
+import database
+from database import User, init_db
+
+LOGINS = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+USERS = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+round_trips = 0
+
+
+def count_statement(*args):
+    global round_trips
+    round_trips += 1
+
+
+def count_commit(*args):
+    global round_trips
+    round_trips += 1
+
+
+def old_login(db, google_id):
+    user = db.query(User).filter(User.google_id == google_id).first()
+    if user:
+        user.last_login = datetime.utcnow()
+        db.commit()
+    else:
+        user = User(google_id=google_id, email=f"{google_id}@example.com", name="Bench")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+    return user.id
+
+
+def new_login(db, google_id):
+    stmt = insert(User).values(
+        google_id=google_id,
+        email=f"{google_id}@example.com",
+        name="Bench",
+        last_login=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.google_id],
+        set_={
+            "name": func.coalesce(stmt.excluded.name, User.name),
+            "picture_url": func.coalesce(stmt.excluded.picture_url, User.picture_url),
+            "last_login": stmt.excluded.last_login
+        }
+    ).returning(User.id, User.email, User.name, User.picture_url)
+    user = db.execute(stmt).one()
+    db.commit()
+    return user.id
+
+
+def run(label, login, prefix):
+    global round_trips
+    round_trips = 0
+    google_ids = [f"{prefix}-{i % USERS}" for i in range(LOGINS)]
+    db = database.SessionLocal()
+    start = time.perf_counter()
+    try:
+        for google_id in google_ids:
+            login(db, google_id)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>8}: {LOGINS / elapsed:>8.0f} logins/s  {round_trips / LOGINS:.2f} round trips/login")
+
+
+if __name__ == "__main__":
+    init_db()
+    if not database.db_available:
+        print("A PostgreSQL DATABASE_URL is required for this benchmark.")
+        sys.exit(1)
+
+    event.listen(database.engine, "before_cursor_execute", count_statement)
+    event.listen(database.engine, "commit", count_commit)
+
+    prefix = f"bench-{uuid.uuid4()}"
+    try:
+        run("old", old_login, f"{prefix}-old")
+        run("upsert", new_login, f"{prefix}-new")
+    finally:
+        db = database.SessionLocal()
+        db.query(User).filter(User.google_id.like(f"{prefix}-%")).delete(synchronize_session=False)
+        db.commit()
+        db.close()
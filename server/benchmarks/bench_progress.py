@@ -0,0 +1,82 @@
+"""
+Benchmark: progress chart queries from rollups vs raw interview aggregation.
+
+Needs a PostgreSQL DATABASE_URL in .env (a scratch database, not production).
+Seeds one heavy user with N interviews spread over two years and five topics,
+builds their rollups with rebuild_progress, then times daily and weekly
+progress queries both ways.
+
+Run with: python benchmarks/bench_progress.py [interviews]
+"""
+
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert
+
+import database
+from database import Interview, ProgressRollup, init_db
+from progress import load_progress, rebuild_progress
+
+INTERVIEWS = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+TOPICS = ["System Design", "Behavioral", "Algorithms", "Case Study", "Technical"]
+REPEAT = 20
+
+
+def seed(db, user_id: str):
+    start = datetime.utcnow() - timedelta(days=730)
+    step = timedelta(days=730) / INTERVIEWS
+    for offset in range(0, INTERVIEWS, 1000):
+        db.execute(insert(Interview), [
+            {
+                "user_id": user_id,
+                "date": start + step * i,
+                "duration": 1800,
+                "topic": TOPICS[i % len(TOPICS)],
+                "score": 40 + (i % 60),
+                "strengths": [],
+                "weaknesses": [],
+                "suggestions": [],
+            }
+            for i in range(offset, min(offset + 1000, INTERVIEWS))
+        ])
+    db.commit()
+
+
+def raw_progress(db, user_id: str, bucket: str):
+    start = func.date_trunc(bucket, func.timezone("UTC", Interview.date))
+    return db.query(start, func.count(Interview.id), func.avg(Interview.score))\
+        .filter(Interview.user_id == user_id)\
+        .group_by(start)\
+        .order_by(start)\
+        .all()
+
+
+if __name__ == "__main__":
+    init_db()
+    if not database.db_available:
+        print("A PostgreSQL DATABASE_URL is required for this benchmark.")
+        sys.exit(1)
+
+    user_id = str(uuid.uuid4())
+    db = database.SessionLocal()
+    try:
+        print(f"Seeding {INTERVIEWS} interviews...")
+        seed(db, user_id)
+        rebuild_progress(db, user_id)
+
+        for bucket in ("day", "week"):
+            points = len(load_progress(db, user_id, bucket))
+            raw = timeit.timeit(lambda: raw_progress(db, user_id, bucket), number=REPEAT) / REPEAT * 1e3
+            rolled = timeit.timeit(lambda: load_progress(db, user_id, bucket), number=REPEAT) / REPEAT * 1e3
+            print(f"{bucket:>5}: {points} buckets  raw {raw:.2f} ms  rollup {rolled:.2f} ms  ({raw / rolled:.1f}x)")
+    finally:
+        db.query(Interview).filter(Interview.user_id == user_id).delete()
+        db.query(ProgressRollup).filter(ProgressRollup.user_id == user_id).delete()
+        db.commit()
+        db.close()
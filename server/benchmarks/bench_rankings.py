@@ -0,0 +1,43 @@
+"""
+Benchmark: histogram-backed percentile and top-N queries vs an exact scan.
+
+The exact path mirrors what PERCENTILE_CONT would do per request: look at
+every score for the topic. The histogram path only touches SCORE_BUCKETS
+counts, so its cost stays flat as the number of interviews grows.
+
+Run with: python benchmarks/bench_rankings.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rankings import SCORE_BUCKETS, score_bucket, percentile, top_buckets
+
+SIZES = [10_000, 1_000_000, 5_000_000]
+REPEAT = 20
+
+
+def exact_percentile(scores, score):
+    below = sum(1 for s in scores if s < score)
+    return 100 * below / len(scores)
+
+
+if __name__ == "__main__":
+    random.seed(42)
+    print(f"{'interviews':>12} {'exact (ms)':>12} {'histogram (us)':>16} {'top-10 (us)':>12} {'error':>7}")
+    for size in SIZES:
+        scores = [min(max(random.gauss(70, 12), 0), 100) for _ in range(size)]
+        histogram = [0] * SCORE_BUCKETS
+        for s in scores:
+            histogram[score_bucket(s)] += 1
+
+        probe = 85.0
+        exact = timeit.timeit(lambda: exact_percentile(scores, probe), number=1) * 1e3
+        fast = timeit.timeit(lambda: percentile(histogram, probe), number=REPEAT) / REPEAT * 1e6
+        top = timeit.timeit(lambda: top_buckets(histogram, 10), number=REPEAT) / REPEAT * 1e6
+        error = abs(exact_percentile(scores, probe) - percentile(histogram, probe))
+        print(f"{size:>12} {exact:>12.1f} {fast:>16.1f} {top:>12.1f} {error:>6.2f}%")
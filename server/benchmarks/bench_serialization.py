@@ -0,0 +1,79 @@
+"""
+Microbenchmark: cost of serializing an interview history page.
+
+Compares the old path (build InterviewResponse objects, let FastAPI validate
+them against response_model, encode with the stdlib json encoder) against the
+fast path (plain dicts straight from rows, encoded with orjson).
+
+Run with: python benchmarks/bench_serialization.py
+"""
+
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+
+from api_main import InterviewResponse, interview_to_dict
+
+PAGE_SIZES = [1, 10, 50, 200]
+REPEAT = 200
+
+
+def make_rows(n: int) -> list:
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            date=datetime.utcnow(),
+            duration=1800,
+            topic="System Design",
+            score=82.5,
+            strengths=["Clear communication", "Structured answers", "Good trade-offs"],
+            weaknesses=["Rushed the estimation", "Skipped failure modes"],
+            suggestions=["Practice capacity planning", "Talk through edge cases", "Summarize at the end"],
+        )
+        for _ in range(n)
+    ]
+
+
+def old_path(rows, adapter):
+    page = [
+        InterviewResponse(
+            id=str(i.id),
+            date=i.date,
+            duration=i.duration,
+            topic=i.topic,
+            score=i.score,
+            strengths=i.strengths,
+            weaknesses=i.weaknesses,
+            suggestions=i.suggestions
+        )
+        for i in rows
+    ]
+    # FastAPI re-validates the returned objects against response_model
+    validated = adapter.validate_python(adapter.dump_python(page))
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def fast_path(rows):
+    return orjson.dumps([interview_to_dict(i) for i in rows])
+
+
+if __name__ == "__main__":
+    adapter = TypeAdapter(List[InterviewResponse])
+    print(f"{'page size':>10} {'old (us)':>12} {'fast (us)':>12} {'speedup':>9}")
+    for size in PAGE_SIZES:
+        rows = make_rows(size)
+        old = timeit.timeit(lambda: old_path(rows, adapter), number=REPEAT) / REPEAT * 1e6
+        fast = timeit.timeit(lambda: fast_path(rows), number=REPEAT) / REPEAT * 1e6
+        print(f"{size:>10} {old:>12.1f} {fast:>12.1f} {old / fast:>8.1f}x")
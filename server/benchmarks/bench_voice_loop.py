@@ -0,0 +1,131 @@
+"""
+Benchmark: CPU, allocations and latency of the voice loop's receive path.
+
+Replays a recorded Live API session (LIVE_RECORD_FILE, see live_replay.py)
+through main.receive_audio and main.play_audio with null audio devices, so
+it runs on a headless box with no Gemini connection. Without a recording,
+a synthetic session of --turns turns is generated instead.
+
+Run with:
+    python benchmarks/bench_voice_loop.py [recording.jsonl.gz] [--speed 0] [--turns 50]
+
+--speed 0 replays as fast as possible (CPU/allocation numbers); --speed 1
+replays in real time, with the null speaker paced like a real device, which
+gives meaningful latency histograms.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types as pytypes
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.genai import types
+
+from live_replay import NullPyAudio, ReplaySession, load_recording
+
+# main.py opens PyAudio at import time; give it null devices instead
+sys.modules["pyaudio"] = pytypes.SimpleNamespace(paInt16=NullPyAudio.paInt16, PyAudio=NullPyAudio)
+
+import main
+
+RECEIVE_SAMPLE_RATE = 24000
+PART_MS = 40
+
+
+def synthesize_session(turns: int) -> list:
+    """Events for `turns` exchanges: 1.5s of mic audio, then a 3s spoken reply in 40ms parts."""
+    events = []
+    part = bytes(RECEIVE_SAMPLE_RATE * 2 * PART_MS // 1000)
+    t = 0.0
+    for turn in range(turns):
+        for _ in range(24):  # 1.5s of 1024-sample mic chunks at 16kHz
+            t += 0.064
+            events.append((t, None))
+        t += 0.1
+        events.append((t, types.LiveServerMessage(server_content=types.LiveServerContent(
+            input_transcription=types.Transcription(text=f"Question {turn} from the candidate.")
+        ))))
+        t += 0.5
+        for _ in range(3000 // PART_MS):
+            events.append((t, types.LiveServerMessage(server_content=types.LiveServerContent(
+                model_turn=types.Content(role="model", parts=[
+                    types.Part(inline_data=types.Blob(data=part, mime_type="audio/pcm"))
+                ])
+            ))))
+            t += PART_MS / 1000 / 2  # the model streams faster than real time
+        events.append((t, types.LiveServerMessage(server_content=types.LiveServerContent(
+            output_transcription=types.Transcription(text=f"Answer {turn} from the interviewer."),
+            turn_complete=True
+        ))))
+    return events
+
+
+async def replay(events: list, speed: float) -> ReplaySession:
+    main.pya = NullPyAudio(speed=speed)
+    session = ReplaySession(events, speed=speed, on_mic=main.latency_tracer.mic_sent)
+    history = []
+
+    tasks = [
+        asyncio.create_task(main.receive_audio(session, history)),
+        asyncio.create_task(main.play_audio()),
+    ]
+    await session.finished.wait()
+    while not main.audio_queue_output.empty():
+        await asyncio.sleep(0.001)
+    # Let the last write finish
+    await asyncio.sleep(0.01)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return session
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("recording", nargs="?")
+    parser.add_argument("--speed", type=float, default=0)
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.recording:
+        metadata, events = load_recording(args.recording)
+    else:
+        metadata, events = {"synthetic_turns": args.turns}, synthesize_session(args.turns)
+
+    messages = sum(1 for _, message in events if message is not None)
+
+    # Keep history and latency files out of the working directory
+    workdir = tempfile.mkdtemp()
+    main.HISTORY_FILE = os.path.join(workdir, "history.json")
+    main.LATENCY_FILE = os.path.join(workdir, "latency.json")
+    # Mic timings are only meaningful for push-to-talk recordings
+    main.latency_tracer.track_mic = metadata.get("push_to_talk", True)
+
+    tracemalloc.start()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(replay(events, args.speed))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    speaker = main.pya.streams[0]
+    print(f"Recording: {metadata}")
+    print(f"Replayed {messages} server messages at speed {args.speed or 'max'}")
+    print(f"  wall {wall:.3f}s  cpu {cpu:.3f}s  ({cpu / messages * 1e6:.1f} us cpu/message)")
+    print(f"  peak traced memory {peak / 1024:.0f} KiB")
+    print(f"  speaker: {speaker.writes} writes, {speaker.bytes_written / 1024:.0f} KiB")
+    summary = main.latency_tracer.summary()
+    print(f"  turns traced: {summary['turns']}")
+    for name, metric in summary["metrics"].items():
+        print(f"  {name:>28}: p50 {metric['p50']} ms  p90 {metric['p90']} ms  p99 {metric['p99']} ms")
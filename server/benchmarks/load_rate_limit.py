@@ -0,0 +1,111 @@
+"""
+Load test: latency for well-behaved users while one client floods the API.
+
+Start the API first (uvicorn api_main:app), with the same JWT_SECRET_KEY in
+.env so the tokens minted here are accepted. Then run:
+
+    python benchmarks/load_rate_limit.py [base_url] [--spread]
+
+Well-behaved users each request their history once a second. The abusive
+client fires POST /api/interviews and GET /api/interviews as fast as it can
+with many connections. Compare the good users' p99 with RATE_LIMIT_ENABLED
+set to true and false on the server.
+
+With --spread every abusive connection signs in as its own user, so per-user
+limits barely apply and the load reaches the database. Run it against a
+server with a DATABASE_URL to exercise DB admission control; compare
+MAX_CONCURRENT_DB_REQUESTS=12 with a value above the pool size.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth import create_access_token
+
+DURATION = 30
+GOOD_USERS = 20
+ABUSER_CONNECTIONS = 50
+
+INTERVIEW = {
+    "duration": 1200,
+    "topic": "System Design",
+    "transcript": "Interviewer: ... Candidate: ...",
+    "score": 75.0,
+    "strengths": ["Structure"],
+    "weaknesses": ["Estimation"],
+    "suggestions": ["Practice capacity planning"],
+}
+
+
+async def request(client, method, url, statuses, **kwargs):
+    """Send a request and count its status; an exhausted server shows up as timeouts and errors."""
+    try:
+        response = await client.request(method, url, **kwargs)
+        statuses[response.status_code] += 1
+    except httpx.TransportError as e:
+        statuses[type(e).__name__] += 1
+
+
+def auth_headers() -> dict:
+    user_id = str(uuid.uuid4())
+    token = create_access_token({"user_id": user_id, "email": f"{user_id}@example.com"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def good_user(client, deadline, latencies, statuses):
+    headers = auth_headers()
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        await request(client, "GET", "/api/interviews", statuses, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(1)
+
+
+async def abuser(client, headers, deadline, statuses):
+    while time.monotonic() < deadline:
+        await request(client, "POST", "/api/interviews", statuses, json=INTERVIEW, headers=headers)
+        await request(client, "GET", "/api/interviews", statuses, headers=headers)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] * 1000
+
+
+async def main(base_url: str, spread: bool):
+    deadline = time.monotonic() + DURATION
+    latencies = []
+    good_statuses = Counter()
+    abuser_statuses = Counter()
+    abuser_headers = auth_headers()
+    limits = httpx.Limits(max_connections=GOOD_USERS + ABUSER_CONNECTIONS)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(
+            *(good_user(client, deadline, latencies, good_statuses) for _ in range(GOOD_USERS)),
+            *(
+                abuser(client, auth_headers() if spread else abuser_headers, deadline, abuser_statuses)
+                for _ in range(ABUSER_CONNECTIONS)
+            ),
+        )
+
+    print(f"Good users:  {len(latencies)} requests, statuses {dict(good_statuses)}")
+    print(f"  p50 {percentile(latencies, 50):.1f} ms  p99 {percentile(latencies, 99):.1f} ms")
+    print(f"Abuser:      {sum(abuser_statuses.values())} requests, statuses {dict(abuser_statuses)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base_url", nargs="?", default="http://localhost:8000")
+    parser.add_argument("--spread", action="store_true", help="one user per abusive connection")
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.spread))
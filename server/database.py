@@ -1,8 +1,10 @@
-from sqlalchemy import create_engine, Column, String, Integer, Float, TIMESTAMP, ARRAY, Text
+from sqlalchemy import create_engine, text, Column, String, Integer, Float, Date, TIMESTAMP, ARRAY, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
+import time
+import itertools
 from datetime import datetime
 from pydantic_settings import BaseSettings
 from functools import lru_cache
@@ -14,6 +16,13 @@ db_available = False
 # Settings
 class Settings(BaseSettings):
     database_url: Optional[str] = None
+    histogram_rebuild_interval_seconds: int = 3600
+    # Comma-separated read replica URLs
+    database_replica_urls: Optional[str] = None
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_seconds: float = 5.0
+    # How long a user's reads stay on the primary after they write
+    read_your_writes_seconds: float = 10.0
     
     class Config:
         env_file = ".env"
@@ -40,6 +49,32 @@ if settings.database_url:
 else:
     print("⚠️ No DATABASE_URL found. Running in no-database mode.")
 
+# Read replicas: list of [session factory, engine, last measured lag, last check time]
+replicas = []
+_replica_cycle = None
+
+def configure_replicas(urls: str):
+    """Create engines for a comma-separated list of read replica URLs"""
+    global replicas, _replica_cycle
+    replicas = []
+    for url in urls.split(","):
+        url = url.strip()
+        if not url:
+            continue
+        try:
+            replica_engine = create_engine(url)
+            replica_session = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+            replicas.append([replica_session, replica_engine, 0.0, 0.0])
+        except Exception as e:
+            print(f"⚠️ Failed to create replica engine: {e}")
+    _replica_cycle = itertools.cycle(range(len(replicas))) if replicas else None
+
+if SessionLocal is not None and settings.database_replica_urls:
+    configure_replicas(settings.database_replica_urls)
+
+# user_id -> time until which that user's reads go to the primary
+_primary_pins = {}
+
 Base = declarative_base()
 
 # Models
@@ -69,6 +104,23 @@ class Interview(Base):
     suggestions = Column(ARRAY(Text))
     created_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow)
 
+class TopicScoreBucket(Base):
+    __tablename__ = "topic_score_histogram"
+    
+    topic = Column(String(100), primary_key=True)
+    bucket = Column(Integer, primary_key=True)  # floor(score), 0-100
+    count = Column(Integer, nullable=False, default=0)
+
+class ProgressRollup(Base):
+    __tablename__ = "progress_rollups"
+    
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    bucket = Column(String(10), primary_key=True)  # "day" or "week"
+    bucket_start = Column(Date, primary_key=True)  # UTC day, or Monday of the week
+    topic = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+
 # Database dependency
 def get_db():
     if not db_available or SessionLocal is None:
@@ -84,6 +136,83 @@ def get_db():
     finally:
         db.close()
 
+def pin_user_to_primary(user_id: str):
+    """Send a user's reads to the primary for a short while so they see their own writes"""
+    now = time.monotonic()
+    _primary_pins[user_id] = now + settings.read_your_writes_seconds
+    # Drop expired pins so the table doesn't grow without bound
+    if len(_primary_pins) > 10000:
+        for key in [k for k, until in _primary_pins.items() if until <= now]:
+            del _primary_pins[key]
+
+def _primary_wal_lsn() -> str:
+    """The primary's current WAL position"""
+    with SessionLocal() as db:
+        return db.execute(text("SELECT pg_current_wal_lsn()::text")).scalar()
+
+def _replica_replay_status(replica_engine, primary_lsn: str):
+    """(replayed up to primary_lsn, seconds since the last replayed transaction) for a replica"""
+    with replica_engine.connect() as conn:
+        return tuple(conn.execute(text(
+            "SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn), "
+            "EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+        ), {"lsn": primary_lsn}).one())
+
+def _replica_lag(replica) -> float:
+    """Replication lag in seconds, re-measured at most every replica_lag_check_seconds"""
+    _, replica_engine, lag, checked_at = replica
+    now = time.monotonic()
+    if now - checked_at < settings.replica_lag_check_seconds:
+        return lag
+    try:
+        # Compare against the primary rather than against what the replica has received:
+        # a replica whose WAL receiver is down or slow replays all it has and still falls behind
+        caught_up, replay_age = _replica_replay_status(replica_engine, _primary_wal_lsn())
+        if caught_up is None or caught_up:
+            # Replayed everything the primary had written when asked, however long ago the
+            # last transaction was. NULL means the URL points at a server not in recovery.
+            lag = 0.0
+        elif replay_age is None:
+            lag = float("inf")
+        else:
+            lag = float(replay_age)
+    except Exception as e:
+        print(f"⚠️ Replica lag check failed: {e}")
+        lag = float("inf")
+    replica[2] = lag
+    replica[3] = now
+    return lag
+
+def _pick_replica():
+    """Next replica within the lag budget, or None to fall back to the primary"""
+    for _ in range(len(replicas)):
+        replica = replicas[next(_replica_cycle)]
+        if _replica_lag(replica) <= settings.replica_max_lag_seconds:
+            return replica[0]
+    return None
+
+def read_session_factory(user_id: str):
+    """Session factory for a user's reads: a healthy replica unless the user is pinned to the primary"""
+    pinned_until = _primary_pins.get(user_id)
+    if replicas and (pinned_until is None or pinned_until <= time.monotonic()):
+        return _pick_replica() or SessionLocal
+    return SessionLocal
+
+# Read-only session for a user's GET requests; api_main wraps this in a dependency
+def get_read_db_for(user_id: str):
+    if not db_available or SessionLocal is None:
+        try:
+            yield None
+        finally:
+            pass
+        return
+
+    db = read_session_factory(user_id)()
+    try:
+        yield db
+    finally:
+        db.close()
+
 # Create tables
 def init_db():
     """Initialize database tables"""
@@ -26,6 +26,27 @@ CREATE TABLE interviews (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Per-topic score histogram (one row per topic and 1-point score bucket)
+-- Updated on every interview insert, rebuilt periodically from interviews
+CREATE TABLE topic_score_histogram (
+    topic VARCHAR(100) NOT NULL,
+    bucket INTEGER NOT NULL, -- floor(score), 0-100
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (topic, bucket)
+);
+
+-- Per-user score rollups by day and week, for progress charts
+-- Updated on every interview insert; rebuild with: python progress.py
+CREATE TABLE progress_rollups (
+    user_id UUID NOT NULL,
+    bucket VARCHAR(10) NOT NULL, -- 'day' or 'week'
+    bucket_start DATE NOT NULL, -- UTC day, or Monday of the week
+    topic VARCHAR(100) NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    score_sum FLOAT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, bucket, bucket_start, topic)
+);
+
 -- Create indexes for better query performance
 CREATE INDEX idx_users_google_id ON users(google_id);
 CREATE INDEX idx_users_email ON users(email);
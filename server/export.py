@@ -0,0 +1,115 @@
+"""
+Streaming export of a user's full interview history as NDJSON or CSV.
+
+Rows are read through a server-side cursor in fixed-size batches and encoded
+batch by batch, so memory use does not depend on how many interviews the
+user has.
+"""
+
+import csv
+import io
+import zlib
+
+import orjson
+from sqlalchemy import select
+
+from database import Interview
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    Interview.id,
+    Interview.date,
+    Interview.duration,
+    Interview.topic,
+    Interview.score,
+    Interview.strengths,
+    Interview.weaknesses,
+    Interview.suggestions,
+    Interview.transcript,
+)
+
+CSV_HEADER = [column.key for column in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _ndjson_batch(rows) -> bytes:
+    return b"".join(orjson.dumps(dict(row._mapping)) + b"\n" for row in rows)
+
+
+def _csv_row(row) -> list:
+    return [
+        str(row.id),
+        row.date.isoformat() if row.date else "",
+        row.duration,
+        row.topic,
+        row.score,
+        # Arrays are JSON-encoded so the cells round-trip exactly
+        orjson.dumps(row.strengths).decode(),
+        orjson.dumps(row.weaknesses).decode(),
+        orjson.dumps(row.suggestions).decode(),
+        row.transcript,
+    ]
+
+
+def _csv_batch(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_HEADER)
+    writer.writerows(_csv_row(row) for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def stream_interviews(session_factory, user_id: str, fmt: str, compress: bool = False, release=None):
+    """
+    Yield the encoded export for a user, one batch at a time.
+
+    Opens its own session: the response body is streamed after request
+    dependencies have already been torn down. For the same reason the caller
+    takes the DB admission slot and passes its `release`, which runs as soon
+    as the stream ends.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31 = gzip container
+
+    try:
+        yield from _stream_batches(session_factory, user_id, fmt, compressor)
+    finally:
+        if release:
+            release()
+
+
+def _stream_batches(session_factory, user_id: str, fmt: str, compressor):
+    db = session_factory()
+    try:
+        query = select(*EXPORT_COLUMNS)\
+            .where(Interview.user_id == user_id)\
+            .order_by(Interview.date.desc())\
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+        if fmt == "csv":
+            chunks = (
+                _csv_batch(rows, header=(i == 0))
+                for i, rows in enumerate(db.execute(query).partitions())
+            )
+        else:
+            chunks = (_ndjson_batch(rows) for rows in db.execute(query).partitions())
+
+        empty = True
+        for chunk in chunks:
+            empty = False
+            yield compressor.compress(chunk) if compressor else chunk
+
+        # Users with no interviews still get a CSV header
+        if fmt == "csv" and empty:
+            chunk = _csv_batch([], header=True)
+            yield compressor.compress(chunk) if compressor else chunk
+
+        if compressor:
+            yield compressor.flush()
+    finally:
+        db.close()
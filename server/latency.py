@@ -0,0 +1,158 @@
+"""
+End-to-end voice latency tracing for the Live API audio loop.
+
+Each turn records when the last mic chunk was sent, when the user's speech
+was transcribed, when the first model audio arrived, when it first reached
+the speaker and when the turn completed. Finished turns feed per-session
+latency histograms that main.py prints live and saves next to the history.
+
+Mic timings only mean something in push-to-talk mode, where the last chunk
+marks the end of the user's speech. In continuous mode the mic never stops
+sending, so the tracer is created with track_mic=False and the mic_* metrics
+stay empty.
+"""
+
+import bisect
+import time
+from datetime import datetime
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = [50, 100, 150, 200, 300, 400, 500, 750, 1000, 1500, 2000, 3000, 5000, float("inf")]
+
+# metric name -> (start event, end event)
+METRICS = {
+    "mic_to_first_play": ("last_mic_sent", "first_play"),
+    "mic_to_first_model_audio": ("last_mic_sent", "first_model_audio"),
+    "model_audio_to_play": ("first_model_audio", "first_play"),
+    "transcription_to_first_play": ("last_input_transcription", "first_play"),
+    "mic_to_turn_complete": ("last_mic_sent", "turn_complete"),
+}
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram that also keeps raw samples for exact percentiles."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.samples = []
+
+    def add(self, value_ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, value_ms)] += 1
+        bisect.insort(self.samples, value_ms)
+
+    def percentile(self, p: float):
+        if not self.samples:
+            return None
+        index = min(len(self.samples) - 1, int(len(self.samples) * p / 100))
+        return round(self.samples[index], 1)
+
+    def summary(self) -> dict:
+        return {
+            "count": len(self.samples),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": {
+                ("inf" if le == float("inf") else str(le)): count
+                for le, count in zip(BUCKETS_MS, self.counts)
+            },
+        }
+
+
+class TurnTiming:
+    """Pipeline timestamps for one turn. `metrics` is filled in once the turn finishes."""
+
+    def __init__(self):
+        self.last_mic_sent = None
+        self.first_input_transcription = None
+        self.last_input_transcription = None
+        self.first_model_audio = None
+        self.first_play = None
+        self.turn_complete = None
+        self.interrupted = False
+        self.finished = False
+        self.metrics = {}
+
+
+class LatencyTracer:
+    def __init__(self, on_finish=None, track_mic: bool = True):
+        self.on_finish = on_finish  # called with each finished TurnTiming
+        self.track_mic = track_mic
+        self.started = datetime.now().isoformat()
+        self.histograms = {name: LatencyHistogram() for name in METRICS}
+        self.turns = 0
+        self.current = TurnTiming()
+
+    # --- Pipeline events ---
+
+    def mic_sent(self):
+        if not self.track_mic:
+            return
+        # Once the model has started answering, later mic audio belongs to the next turn
+        if self.current.first_model_audio is None:
+            self.current.last_mic_sent = time.perf_counter()
+
+    def input_transcription(self):
+        now = time.perf_counter()
+        if self.current.first_input_transcription is None:
+            self.current.first_input_transcription = now
+        self.current.last_input_transcription = now
+
+    def model_audio(self) -> TurnTiming:
+        """Mark model audio for the current turn. Returns the turn to tag the audio with."""
+        if self.current.first_model_audio is None:
+            self.current.first_model_audio = time.perf_counter()
+        return self.current
+
+    def audio_played(self, turn: TurnTiming):
+        if turn.first_play is None:
+            turn.first_play = time.perf_counter()
+            self._maybe_finish(turn)
+
+    def interrupted(self):
+        self.current.interrupted = True
+
+    def abandon_turn(self):
+        """Start a new turn without recording the current one, e.g. after the connection broke mid-turn."""
+        self.current = TurnTiming()
+
+    def turn_complete(self) -> TurnTiming:
+        """Close the current turn and start the next one. Returns the closed turn."""
+        turn = self.current
+        turn.turn_complete = time.perf_counter()
+        self.current = TurnTiming()
+        self._maybe_finish(turn)
+        return turn
+
+    # --- Aggregation ---
+
+    def _maybe_finish(self, turn: TurnTiming):
+        # Playback usually outlasts turn_complete, so wait for both unless nothing will play
+        if turn.turn_complete is None:
+            return
+        if turn.first_play is not None or turn.first_model_audio is None or turn.interrupted:
+            self._finish(turn)
+
+    def _finish(self, turn: TurnTiming):
+        if turn.finished:
+            return
+        turn.finished = True
+        self.turns += 1
+        for name, (start, end) in METRICS.items():
+            start_at, end_at = getattr(turn, start), getattr(turn, end)
+            if start_at is not None and end_at is not None:
+                value_ms = (end_at - start_at) * 1000
+                turn.metrics[name] = round(value_ms, 1)
+                self.histograms[name].add(value_ms)
+        if turn.interrupted:
+            turn.metrics["interrupted"] = True
+        if self.on_finish:
+            self.on_finish(turn)
+
+    def summary(self) -> dict:
+        return {
+            "started": self.started,
+            "mic_tracked": self.track_mic,
+            "turns": self.turns,
+            "metrics": {name: h.summary() for name, h in self.histograms.items()},
+        }
@@ -0,0 +1,240 @@
+"""
+Record and replay Live API sessions for the voice loop in main.py.
+
+LiveRecorder captures the server messages a session receives (audio parts,
+transcriptions, turn_complete, interrupted) and the times mic chunks were
+sent, with timestamps, to a gzipped JSON-lines file. Set LIVE_RECORD_FILE
+in .env to record while running main.py normally.
+
+ReplaySession plays a recording back into receive_audio at real or
+accelerated speed, and NullPyAudio stands in for PyAudio, so the receive
+and playback coroutines can run without a Gemini connection, microphone or
+speakers. See benchmarks/bench_voice_loop.py.
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import time
+
+from google.genai import types
+
+FORMAT_VERSION = 1
+
+
+# ==================== RECORDING ====================
+
+def encode_message(response) -> dict:
+    """Keep only the fields the voice loop reads, omitting empty ones."""
+    event = {}
+    content = response.server_content
+    if not content:
+        return event
+
+    if content.input_transcription and content.input_transcription.text:
+        event["input"] = content.input_transcription.text
+    if content.output_transcription and content.output_transcription.text:
+        event["output"] = content.output_transcription.text
+    if content.model_turn and content.model_turn.parts:
+        audio, text = [], []
+        for part in content.model_turn.parts:
+            if part.inline_data and isinstance(part.inline_data.data, bytes):
+                audio.append(base64.b64encode(part.inline_data.data).decode("ascii"))
+            if part.text:
+                text.append(part.text)
+        if audio:
+            event["audio"] = audio
+        if text:
+            event["text"] = text
+    if content.turn_complete:
+        event["turn_complete"] = True
+    if content.interrupted:
+        event["interrupted"] = True
+    return event
+
+
+class LiveRecorder:
+    """Writes timestamped session events to a gzipped JSON-lines file."""
+
+    def __init__(self, path: str, **metadata):
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        self.started = time.perf_counter()
+        self._write({"version": FORMAT_VERSION, **metadata})
+
+    def _write(self, event: dict):
+        self.file.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+    def _elapsed(self) -> float:
+        return round(time.perf_counter() - self.started, 4)
+
+    def mic_sent(self):
+        self._write({"t": self._elapsed(), "mic": 1})
+
+    def server_message(self, response):
+        event = encode_message(response)
+        if event:
+            self._write({"t": self._elapsed(), **event})
+
+    def wrap(self, session):
+        return RecordingSession(session, self)
+
+    def close(self):
+        self.file.close()
+
+
+class RecordingSession:
+    """Proxies a live session, recording what passes through it."""
+
+    def __init__(self, session, recorder: LiveRecorder):
+        self.session = session
+        self.recorder = recorder
+
+    async def send_realtime_input(self, **kwargs):
+        await self.session.send_realtime_input(**kwargs)
+        self.recorder.mic_sent()
+
+    async def receive(self):
+        async for response in self.session.receive():
+            self.recorder.server_message(response)
+            yield response
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+# ==================== REPLAY ====================
+
+def decode_message(event: dict) -> types.LiveServerMessage:
+    """Rebuild a LiveServerMessage from a recorded event."""
+    parts = [
+        types.Part(inline_data=types.Blob(data=base64.b64decode(audio), mime_type="audio/pcm"))
+        for audio in event.get("audio", [])
+    ]
+    parts += [types.Part(text=text) for text in event.get("text", [])]
+
+    return types.LiveServerMessage(server_content=types.LiveServerContent(
+        model_turn=types.Content(role="model", parts=parts) if parts else None,
+        input_transcription=types.Transcription(text=event["input"]) if "input" in event else None,
+        output_transcription=types.Transcription(text=event["output"]) if "output" in event else None,
+        turn_complete=event.get("turn_complete"),
+        interrupted=event.get("interrupted"),
+    ))
+
+
+def load_recording(path: str):
+    """Return (metadata, events) with server messages already decoded."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        metadata = json.loads(f.readline())
+        events = []
+        for line in f:
+            event = json.loads(line)
+            if "mic" in event:
+                events.append((event["t"], None))
+            else:
+                events.append((event["t"], decode_message(event)))
+    return metadata, events
+
+
+class ReplaySession:
+    """
+    Stands in for a live session, replaying recorded server messages.
+
+    `speed` scales the recorded timing (2.0 plays twice as fast); 0 replays
+    with no delays. Recorded mic sends are reported through `on_mic` so
+    latency tracing sees the same turn boundaries as the original run.
+    `finished` is set once every event has been delivered.
+    """
+
+    def __init__(self, events: list, speed: float = 1.0, on_mic=None):
+        self.events = events
+        self.speed = speed
+        self.on_mic = on_mic
+        self.finished = asyncio.Event()
+        self.sent_chunks = 0
+        self._index = 0
+        self._started = None
+
+    async def send_realtime_input(self, **kwargs):
+        self.sent_chunks += 1
+
+    async def _wait_until(self, t: float):
+        if self.speed <= 0:
+            # Still yield so the playback task can interleave as it would live
+            await asyncio.sleep(0)
+            return
+        delay = self._started + t / self.speed - time.perf_counter()
+        await asyncio.sleep(max(0.0, delay))
+
+    async def receive(self):
+        if self._started is None:
+            self._started = time.perf_counter()
+
+        while self._index < len(self.events):
+            t, message = self.events[self._index]
+            self._index += 1
+            await self._wait_until(t)
+
+            if message is None:
+                if self.on_mic:
+                    self.on_mic()
+                continue
+
+            yield message
+            if message.server_content and message.server_content.turn_complete:
+                return
+
+        self.finished.set()
+        # A live session would stay open waiting for the next turn
+        await asyncio.Event().wait()
+
+
+# ==================== NULL AUDIO DEVICES ====================
+
+class NullStream:
+    """PyAudio stream that reads silence and discards writes, optionally at device pace."""
+
+    def __init__(self, rate: int, channels: int = 1, sample_width: int = 2, speed: float = 1.0):
+        self.bytes_per_second = rate * channels * sample_width
+        self.sample_width = sample_width * channels
+        self.speed = speed
+        self.bytes_written = 0
+        self.writes = 0
+
+    def _pace(self, nbytes: int):
+        if self.speed > 0:
+            time.sleep(nbytes / self.bytes_per_second / self.speed)
+
+    def read(self, frames: int, exception_on_overflow: bool = True) -> bytes:
+        data = bytes(frames * self.sample_width)
+        self._pace(len(data))
+        return data
+
+    def write(self, data: bytes):
+        self.bytes_written += len(data)
+        self.writes += 1
+        self._pace(len(data))
+
+    def close(self):
+        pass
+
+
+class NullPyAudio:
+    """Drop-in for pyaudio.PyAudio on machines without audio devices."""
+
+    paInt16 = 8
+
+    def __init__(self, speed: float = 1.0):
+        self.speed = speed
+        self.streams = []
+
+    def get_default_input_device_info(self) -> dict:
+        return {"index": 0, "name": "null"}
+
+    def open(self, rate: int, channels: int = 1, **kwargs):
+        stream = NullStream(rate, channels, speed=self.speed)
+        self.streams.append(stream)
+        return stream
+
+    def terminate(self):
+        pass
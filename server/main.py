@@ -2,12 +2,16 @@
 Gemini Live API Voice Agent with Native Transcription
 Using the official google-genai SDK for low-latency bidirectional audio streaming.
 Uses Gemini's built-in transcription for both user and AI speech.
-Features: Push-to-talk with SPACE key, real-time streaming, adjusted VAD sensitivity
+Features: Push-to-talk with SPACE key, real-time streaming, adjusted VAD sensitivity,
+automatic reconnect with session resumption and sliding-window context compression
 """
 
 import asyncio
 import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
 
@@ -15,6 +19,9 @@ import pyaudio
 from google import genai
 from dotenv import load_dotenv
 
+from latency import LatencyTracer
+from live_replay import LiveRecorder
+
 # Try to import pynput for push-to-talk
 try:
     from pynput import keyboard
@@ -29,6 +36,8 @@ load_dotenv()
 # --- Configuration ---
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 SYSTEM_INSTRUCTION = os.getenv("SYSTEM_INSTRUCTION", "You are a helpful AI assistant.")
+# Optional: record server messages for offline replay (see live_replay.py)
+LIVE_RECORD_FILE = os.getenv("LIVE_RECORD_FILE")
 
 # Audio settings
 FORMAT = pyaudio.paInt16
@@ -40,8 +49,18 @@ CHUNK_SIZE = 1024
 # Live API config - native audio model
 MODEL = "gemini-2.5-flash-native-audio-preview-12-2025"
 
+# Reconnect settings
+MAX_RECONNECT_ATTEMPTS = 5
+RECONNECT_BACKOFF_SECONDS = 0.5
+# Mic audio kept for replay after a reconnect
+MIC_REPLAY_SECONDS = 10
+MIC_REPLAY_CHUNKS = SEND_SAMPLE_RATE * MIC_REPLAY_SECONDS // CHUNK_SIZE
+# After a GoAway, reconnect at the end of the turn or this long before the server closes
+GO_AWAY_MARGIN_SECONDS = 2.0
+
 # History file
 HISTORY_FILE = "conversation_history.json"
+LATENCY_FILE = "latency_history.json"
 
 # Initialize PyAudio
 pya = pyaudio.PyAudio()
@@ -50,9 +69,33 @@ pya = pyaudio.PyAudio()
 audio_queue_output = asyncio.Queue()
 audio_queue_mic = asyncio.Queue(maxsize=5)
 
+# (message index, chunk) sent but not yet in the server's resumable state,
+# and chunks captured while disconnected
+unacked_audio = deque(maxlen=MIC_REPLAY_CHUNKS)
+pending_audio = deque(maxlen=MIC_REPLAY_CHUNKS)
+
 # Global state
 audio_stream = None
 is_recording = False
+live_connected = asyncio.Event()
+resumption_handle = None
+client_message_index = 0
+go_away_deadline = None
+live_recorder = None
+dropped_chunks = 0
+reconnect_gaps = []
+
+
+class SessionGoAway(Exception):
+    """Planned reconnect after the server announced it will close the connection."""
+
+
+def parse_time_left(time_left) -> float:
+    """Seconds from a GoAway duration such as "50s", or 0 if it can't be read."""
+    try:
+        return float(str(time_left).rstrip("s"))
+    except ValueError:
+        return 0.0
 
 
 def load_history() -> list:
@@ -75,6 +118,59 @@ def save_history(history: list):
         print(f"[History] Could not save history: {e}")
 
 
+def latency_summary() -> dict:
+    """This session's latency histograms plus the settings the numbers depend on."""
+    summary = latency_tracer.summary()
+    # Settings the numbers depend on, for comparing runs while tuning
+    summary["config"] = {
+        "model": MODEL,
+        "chunk_size": CHUNK_SIZE,
+        "send_sample_rate": SEND_SAMPLE_RATE,
+        "mic_queue_size": audio_queue_mic.maxsize,
+        "push_to_talk": PYNPUT_AVAILABLE,
+    }
+    return summary
+
+
+def write_latency(summary: dict):
+    """Save a session's latency summary next to the history, replacing earlier saves of it."""
+    sessions = []
+    if os.path.exists(LATENCY_FILE):
+        try:
+            with open(LATENCY_FILE, "r", encoding="utf-8") as f:
+                sessions = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"[Latency] Could not load latency history: {e}")
+    sessions = [s for s in sessions if s.get("started") != summary["started"]]
+    sessions.append(summary)
+    try:
+        with open(LATENCY_FILE, "w", encoding="utf-8") as f:
+            json.dump(sessions, f, indent=2)
+    except IOError as e:
+        print(f"[Latency] Could not save latency history: {e}")
+
+
+# One worker keeps saves in order and the file I/O off the audio loop
+latency_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="latency")
+
+
+def on_turn_latency(turn):
+    """Print a finished turn's latency and refresh the saved histograms in the background."""
+    response = turn.metrics.get("mic_to_first_play")
+    if response is not None:
+        first_audio = turn.metrics.get("mic_to_first_model_audio")
+        print(f"[Latency] {response:.0f} ms to first audio played "
+              f"({first_audio:.0f} ms to first model audio)")
+    elif turn.metrics.get("transcription_to_first_play") is not None:
+        # Continuous mode: no end-of-speech mic timestamp, time from the user's transcript instead
+        print(f"[Latency] {turn.metrics['transcription_to_first_play']:.0f} ms from transcript "
+              f"to first audio played (continuous mode)")
+    latency_writer.submit(write_latency, latency_summary())
+
+
+latency_tracer = LatencyTracer(on_finish=on_turn_latency, track_mic=PYNPUT_AVAILABLE)
+
+
 def build_system_prompt_with_history(base_instruction: str, history: list) -> str:
     """Build system prompt with conversation history included."""
     if not history:
@@ -138,39 +234,111 @@ async def listen_audio():
         
         # Send audio in real-time while recording (or always if no pynput)
         if is_recording or not PYNPUT_AVAILABLE:
-            await audio_queue_mic.put({"data": data, "mime_type": "audio/pcm"})
+            msg = {"data": data, "mime_type": "audio/pcm"}
+            if live_connected.is_set():
+                await audio_queue_mic.put(msg)
+            else:
+                buffer_pending_audio(msg)
+
+
+def buffer_pending_audio(msg: dict):
+    """Hold a mic chunk captured while disconnected, dropping the oldest when full."""
+    global dropped_chunks
+    if len(pending_audio) == pending_audio.maxlen:
+        dropped_chunks += 1
+    pending_audio.append(msg)
+
+
+async def send_mic_chunk(session, msg: dict):
+    """Send a mic chunk and keep it until the server confirms it has consumed it."""
+    global client_message_index
+    await session.send_realtime_input(audio=msg)
+    # Index 0 is the setup message sent by connect(), so counting from 1 can
+    # at worst replay one chunk twice, never skip one
+    client_message_index += 1
+    latency_tracer.mic_sent()
+    unacked_audio.append((client_message_index, msg))
+
+
+def ack_audio(consumed_index):
+    """Forget mic chunks the server's resumable state already includes."""
+    if consumed_index is None:
+        # Non-transparent update: the handle covers everything sent so far
+        unacked_audio.clear()
+        return
+    while unacked_audio and unacked_audio[0][0] <= consumed_index:
+        unacked_audio.popleft()
 
 
 async def send_realtime(session):
     """Sends audio from the mic queue to the GenAI session in real-time."""
     while True:
         msg = await audio_queue_mic.get()
-        await session.send_realtime_input(audio=msg)
+        await send_mic_chunk(session, msg)
+
+
+async def replay_buffered_audio(session) -> int:
+    """Resend mic audio the server may not have kept, in capture order. Returns chunks sent."""
+    # Unacked chunks are oldest, then anything still queued, then what was captured while down
+    backlog = [msg for _, msg in unacked_audio]
+    unacked_audio.clear()
+    while not audio_queue_mic.empty():
+        backlog.append(audio_queue_mic.get_nowait())
+
+    for msg in backlog:
+        await send_mic_chunk(session, msg)
+    replayed = len(backlog)
+
+    # listen_audio keeps filling pending_audio until live_connected is set
+    while pending_audio:
+        await send_mic_chunk(session, pending_audio.popleft())
+        replayed += 1
+    return replayed
 
 
 async def receive_audio(session, history: list):
     """Receives responses from GenAI and puts audio data into the speaker audio queue."""
     current_user_text = ""
     current_model_text = ""
+    in_turn = False
+    
+    global resumption_handle, go_away_deadline
     
     while True:
-        turn = session.receive()
-        async for response in turn:
+        responses = session.receive()
+        async for response in responses:
+            # Track the latest handle so a dropped connection can resume this session
+            update = response.session_resumption_update
+            if update and update.resumable and update.new_handle:
+                resumption_handle = update.new_handle
+                ack_audio(update.last_consumed_client_message_index)
+            
+            if response.go_away and go_away_deadline is None:
+                time_left = parse_time_left(response.go_away.time_left)
+                # Let the current answer finish; watch_go_away reconnects if it runs long
+                if not in_turn:
+                    raise SessionGoAway(f"time left: {time_left:.0f}s")
+                print(f"\n[Connection] Server closing in {time_left:.0f}s, reconnecting after this turn")
+                go_away_deadline = time.monotonic() + time_left - GO_AWAY_MARGIN_SECONDS
+            
             if response.server_content:
                 content = response.server_content
+                in_turn = not content.turn_complete
                 
                 # Handle USER transcript
                 if hasattr(content, 'input_transcription') and content.input_transcription:
                     if hasattr(content.input_transcription, 'text'):
                         user_text = content.input_transcription.text
                         if user_text:
+                            latency_tracer.input_transcription()
                             current_user_text += user_text
                 
                 # Handle MODEL audio
                 if content.model_turn:
                     for part in content.model_turn.parts:
                         if part.inline_data and isinstance(part.inline_data.data, bytes):
-                            audio_queue_output.put_nowait(part.inline_data.data)
+                            # Tag audio with its turn so play_audio can time the first write
+                            audio_queue_output.put_nowait((latency_tracer.model_audio(), part.inline_data.data))
                         if hasattr(part, 'text') and part.text:
                             current_model_text += part.text
                 
@@ -183,6 +351,8 @@ async def receive_audio(session, history: list):
                 
                 # Handle turn completion
                 if content.turn_complete:
+                    turn = latency_tracer.turn_complete()
+                    
                     if current_user_text.strip():
                         print(f"\n[You] {current_user_text.strip()}")
                         history.append({
@@ -204,20 +374,34 @@ async def receive_audio(session, history: list):
                             history.append({
                                 "role": "model",
                                 "text": clean_text,
-                                "timestamp": datetime.now().isoformat()
+                                "timestamp": datetime.now().isoformat(),
+                                # Filled in once playback starts; saved with the next history write
+                                "latency_ms": turn.metrics
                             })
                         current_model_text = ""
                     
                     save_history(history)
+                    
+                    if go_away_deadline is not None:
+                        raise SessionGoAway("turn complete")
                 
                 # Handle interruption
                 if content.interrupted:
                     print("\n[Agent] *Interrupted*")
+                    latency_tracer.interrupted()
                     while not audio_queue_output.empty():
                         audio_queue_output.get_nowait()
                     current_model_text = ""
 
 
+async def watch_go_away():
+    """Force the planned reconnect if a turn is still running when the GoAway margin is reached."""
+    while go_away_deadline is None:
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(max(0.0, go_away_deadline - time.monotonic()))
+    raise SessionGoAway("server closing")
+
+
 async def play_audio():
     """Plays audio from the speaker audio queue."""
     stream = await asyncio.to_thread(
@@ -229,13 +413,105 @@ async def play_audio():
     )
     
     while True:
-        bytestream = await audio_queue_output.get()
+        turn, bytestream = await audio_queue_output.get()
+        latency_tracer.audio_played(turn)
         await asyncio.to_thread(stream.write, bytestream)
 
 
+def print_instructions():
+    """Print the usage banner shown after the first successful connection."""
+    print()
+    print("-" * 60)
+    if PYNPUT_AVAILABLE:
+        print("  PUSH-TO-TALK MODE:")
+        print("  • Hold SPACE to talk (audio streams in real-time)")
+        print("  • Release SPACE when done")
+        print("  • Gemini waits 1.5 sec of silence before responding")
+        print("  • Press Ctrl+C to exit")
+    else:
+        print("  CONTINUOUS MODE:")
+        print("  • Speak into your microphone")
+        print("  • Gemini waits for silence before responding")
+        print("  • Press Ctrl+C to exit")
+    print("-" * 60)
+    print()
+    print("Ready! Hold SPACE and speak..." if PYNPUT_AVAILABLE else "Ready!")
+    print()
+
+
+async def run_live_sessions(client, config: dict, history: list):
+    """Keeps a Live API session open, resuming it after drops, GoAway or session limits."""
+    global resumption_handle, client_message_index, go_away_deadline
+    
+    attempt = 0
+    disconnected_at = None
+    first_connect = True
+    
+    while True:
+        # A None handle asks for a new resumable session. Transparent mode makes the
+        # server report which mic chunks each handle includes, see ack_audio.
+        config["session_resumption"] = {"handle": resumption_handle, "transparent": True}
+        if resumption_handle is None:
+            # A new session only knows what the prompt tells it, so include the live history
+            config["system_instruction"] = build_system_prompt_with_history(SYSTEM_INSTRUCTION, history)
+        try:
+            print("[Connection] Connecting to Gemini Live API..." if first_connect
+                  else f"[Connection] Reconnecting ({'resuming' if resumption_handle else 'new session'})...")
+            async with client.aio.live.connect(model=MODEL, config=config) as live_session:
+                if live_recorder:
+                    live_session = live_recorder.wrap(live_session)
+                attempt = 0
+                client_message_index = 0
+                go_away_deadline = None
+                replayed = await replay_buffered_audio(live_session)
+                live_connected.set()
+                
+                if first_connect:
+                    print("[Connection] Connected successfully!")
+                    print_instructions()
+                    first_connect = False
+                else:
+                    gap = time.monotonic() - disconnected_at
+                    reconnect_gaps.append(gap)
+                    print(f"[Connection] Resumed after {gap:.2f}s gap, replayed {replayed} mic chunk(s) "
+                          f"({replayed * CHUNK_SIZE / SEND_SAMPLE_RATE:.2f}s of audio), "
+                          f"{dropped_chunks} dropped so far")
+                disconnected_at = None
+                
+                async with asyncio.TaskGroup() as tg:
+                    tg.create_task(send_realtime(live_session))
+                    tg.create_task(receive_audio(live_session, history))
+                    tg.create_task(watch_go_away())
+        except* Exception as eg:
+            live_connected.clear()
+            if disconnected_at is None:
+                disconnected_at = time.monotonic()
+            
+            reason = "; ".join(str(e) for e in eg.exceptions)
+            if all(isinstance(e, SessionGoAway) for e in eg.exceptions):
+                # Planned: keep the handle and the queued answer audio, reconnect right away
+                print(f"\n[Connection] Server going away ({reason})")
+            else:
+                attempt += 1
+                if attempt > MAX_RECONNECT_ATTEMPTS:
+                    print(f"[Connection] Giving up after {MAX_RECONNECT_ATTEMPTS} attempts: {reason}")
+                    raise
+                print(f"\n[Connection] Lost connection: {reason}")
+                
+                # The handle may have expired; fall back to a fresh session with the history prompt
+                if attempt > 1 and resumption_handle:
+                    resumption_handle = None
+                
+                # Drop any model audio from the broken turn; a new session never completes it
+                while not audio_queue_output.empty():
+                    audio_queue_output.get_nowait()
+                latency_tracer.abandon_turn()
+                await asyncio.sleep(RECONNECT_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+
 async def run():
     """Main function to run the audio loop."""
-    global is_recording
+    global is_recording, live_recorder
     
     if not GEMINI_API_KEY:
         print("[Error] GEMINI_API_KEY not found in .env file!")
@@ -253,20 +529,28 @@ async def run():
     if history:
         print(f"[History] Loaded {len(history)} previous entries.")
     
-    # Build system prompt
-    full_system_prompt = build_system_prompt_with_history(SYSTEM_INSTRUCTION, history)
-    
     # Initialize client
     client = genai.Client(api_key=GEMINI_API_KEY)
     
-    # Config with native transcription
+    # Config with native transcription; run_live_sessions adds the system prompt
     config = {
         "response_modalities": ["AUDIO"],
-        "system_instruction": full_system_prompt,
         "input_audio_transcription": {},
         "output_audio_transcription": {},
+        # Drop the oldest turns instead of ending the session at the context limit
+        "context_window_compression": {"sliding_window": {}},
     }
     
+    if LIVE_RECORD_FILE:
+        live_recorder = LiveRecorder(
+            LIVE_RECORD_FILE,
+            model=MODEL,
+            chunk_size=CHUNK_SIZE,
+            receive_sample_rate=RECEIVE_SAMPLE_RATE,
+            push_to_talk=PYNPUT_AVAILABLE
+        )
+        print(f"[Record] Recording session to {LIVE_RECORD_FILE}")
+    
     # Start keyboard listener
     keyboard_listener = None
     if PYNPUT_AVAILABLE:
@@ -277,32 +561,10 @@ async def run():
         is_recording = True
     
     try:
-        print("[Connection] Connecting to Gemini Live API...")
-        async with client.aio.live.connect(model=MODEL, config=config) as live_session:
-            print("[Connection] Connected successfully!")
-            print()
-            print("-" * 60)
-            if PYNPUT_AVAILABLE:
-                print("  PUSH-TO-TALK MODE:")
-                print("  • Hold SPACE to talk (audio streams in real-time)")
-                print("  • Release SPACE when done")
-                print("  • Gemini waits 1.5 sec of silence before responding")
-                print("  • Press Ctrl+C to exit")
-            else:
-                print("  CONTINUOUS MODE:")
-                print("  • Speak into your microphone")
-                print("  • Gemini waits for silence before responding")
-                print("  • Press Ctrl+C to exit")
-            print("-" * 60)
-            print()
-            print("Ready! Hold SPACE and speak..." if PYNPUT_AVAILABLE else "Ready!")
-            print()
-            
-            async with asyncio.TaskGroup() as tg:
-                tg.create_task(send_realtime(live_session))
-                tg.create_task(listen_audio())
-                tg.create_task(receive_audio(live_session, history))
-                tg.create_task(play_audio())
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(listen_audio())
+            tg.create_task(play_audio())
+            tg.create_task(run_live_sessions(client, config, history))
                 
     except asyncio.CancelledError:
         pass
@@ -316,7 +578,15 @@ async def run():
         if audio_stream:
             audio_stream.close()
         pya.terminate()
+        if live_recorder:
+            live_recorder.close()
+        if reconnect_gaps:
+            print(f"\n[Connection] {len(reconnect_gaps)} reconnect(s), "
+                  f"longest gap {max(reconnect_gaps):.2f}s, {dropped_chunks} mic chunk(s) dropped")
         save_history(history)
+        latency_writer.shutdown(wait=True)
+        if latency_tracer.turns:
+            write_latency(latency_summary())
         print("\n[Main] Connection closed. Goodbye!")
 
 
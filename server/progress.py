@@ -0,0 +1,181 @@
+"""
+Score progress over time from per-user daily and weekly rollups.
+
+Each interview adds its score to one "day" and one "week" row for its user
+and topic, so a progress chart reads a few hundred rollup rows instead of
+aggregating the user's raw interviews.
+
+Rollups only grow from interviews saved after the table was created. The
+API backfills them from existing interviews at startup while the table is
+still empty; rebuild all rollups by hand with: python progress.py
+
+Rebuilds hold a SHARE ROW EXCLUSIVE lock on progress_rollups, which blocks
+record_progress until they commit, so they are safe while the API serves
+traffic. Any other bulk rewrite of the table must take the same lock.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, delete, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from database import Interview, ProgressRollup
+
+BUCKETS = ("day", "week")
+
+
+def bucket_start(bucket: str, day: date) -> date:
+    """The day itself, or the Monday of the week containing it."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def record_progress(db: Session, user_id: str, topic: str, when: datetime, score: float):
+    """Add one interview to the user's day and week rollups. Commits with the caller's transaction."""
+    stmt = insert(ProgressRollup).values([
+        {
+            "user_id": user_id,
+            "bucket": bucket,
+            "bucket_start": bucket_start(bucket, when.date()),
+            "topic": topic,
+            "count": 1,
+            "score_sum": score
+        }
+        for bucket in BUCKETS
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            ProgressRollup.user_id,
+            ProgressRollup.bucket,
+            ProgressRollup.bucket_start,
+            ProgressRollup.topic
+        ],
+        set_={
+            "count": ProgressRollup.count + 1,
+            "score_sum": ProgressRollup.score_sum + stmt.excluded.score_sum
+        }
+    )
+    db.execute(stmt)
+
+
+def load_progress(
+    db: Session,
+    user_id: str,
+    bucket: str,
+    topic: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> list:
+    """Average score and interview count per bucket, oldest first, across all topics unless one is given."""
+    query = db.query(
+        ProgressRollup.bucket_start,
+        func.sum(ProgressRollup.count).label("count"),
+        func.sum(ProgressRollup.score_sum).label("score_sum")
+    ).filter(
+        ProgressRollup.user_id == user_id,
+        ProgressRollup.bucket == bucket
+    )
+    if topic:
+        query = query.filter(ProgressRollup.topic == topic)
+    if start:
+        query = query.filter(ProgressRollup.bucket_start >= bucket_start(bucket, start))
+    if end:
+        query = query.filter(ProgressRollup.bucket_start <= end)
+
+    rows = query.group_by(ProgressRollup.bucket_start)\
+        .order_by(ProgressRollup.bucket_start)\
+        .all()
+
+    return [
+        {
+            "bucket_start": row.bucket_start,
+            "count": row.count,
+            "average_score": round(row.score_sum / row.count, 2) if row.count else None
+        }
+        for row in rows
+    ]
+
+
+def _lock_rollups(db: Session):
+    """Block record_progress and other rebuilds until the caller's transaction ends."""
+    db.execute(text(f"LOCK TABLE {ProgressRollup.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+
+
+def rebuild_progress(db: Session, user_id: Optional[str] = None):
+    """Recompute rollups exactly from the interviews table, for one user or everyone."""
+    # Lock before reading interviews, so one saved meanwhile is either in the
+    # aggregate or recorded after the commit, never lost or counted twice
+    _lock_rollups(db)
+    clear = delete(ProgressRollup)
+    if user_id:
+        clear = clear.where(ProgressRollup.user_id == user_id)
+    db.execute(clear)
+
+    for bucket in BUCKETS:
+        start = func.date(func.date_trunc(bucket, func.timezone("UTC", Interview.date)))
+        query = db.query(
+            Interview.user_id,
+            start,
+            Interview.topic,
+            func.count(Interview.id),
+            func.sum(Interview.score)
+        ).filter(
+            Interview.topic.isnot(None),
+            Interview.score.isnot(None),
+            Interview.date.isnot(None)
+        )
+        if user_id:
+            query = query.filter(Interview.user_id == user_id)
+
+        rows = query.group_by(Interview.user_id, start, Interview.topic).all()
+        if rows:
+            db.execute(insert(ProgressRollup), [
+                {
+                    "user_id": row_user_id,
+                    "bucket": bucket,
+                    "bucket_start": row_start,
+                    "topic": topic,
+                    "count": count,
+                    "score_sum": score_sum
+                }
+                for row_user_id, row_start, topic, count, score_sum in rows
+            ])
+    db.commit()
+
+
+def backfill_progress_if_empty(session_factory) -> bool:
+    """Rebuild every rollup when the table has no rows yet, e.g. on first deploy. Returns True if it ran."""
+    db = session_factory()
+    try:
+        # Workers starting together queue here; later ones find the table filled
+        _lock_rollups(db)
+        if db.query(ProgressRollup.user_id).first() is not None:
+            db.rollback()
+            return False
+        if db.query(Interview.id).first() is None:
+            db.rollback()
+            return False
+        rebuild_progress(db)
+        return True
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import sys
+    import database
+
+    database.init_db()
+    if not database.db_available:
+        print("⚠️ Database unavailable. Nothing to rebuild.")
+        sys.exit(1)
+
+    db = database.SessionLocal()
+    try:
+        rebuild_progress(db, sys.argv[1] if len(sys.argv) > 1 else None)
+        print("✅ Progress rollups rebuilt")
+    finally:
+        db.close()
@@ -0,0 +1,126 @@
+"""
+Per-topic score rankings backed by precomputed histograms.
+
+Every interview score is counted into a fixed 1-point bucket (0-100) for its
+topic, so percentile and top-N queries read at most SCORE_BUCKETS rows
+instead of scanning the whole interviews table.
+"""
+
+import asyncio
+from typing import List, Optional
+
+from sqlalchemy import func, delete, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from database import Interview, TopicScoreBucket, get_settings
+
+MIN_SCORE = 0
+MAX_SCORE = 100
+SCORE_BUCKETS = MAX_SCORE - MIN_SCORE + 1
+
+
+def score_bucket(score: float) -> int:
+    """Map a score to its histogram bucket, clamping out-of-range scores."""
+    return min(max(int(score), MIN_SCORE), MAX_SCORE) - MIN_SCORE
+
+
+def record_score(db: Session, topic: str, score: float):
+    """Count one score into the topic histogram. Commits with the caller's transaction."""
+    stmt = insert(TopicScoreBucket).values(
+        topic=topic,
+        bucket=score_bucket(score),
+        count=1
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TopicScoreBucket.topic, TopicScoreBucket.bucket],
+        set_={"count": TopicScoreBucket.count + 1}
+    )
+    db.execute(stmt)
+
+
+def load_histogram(db: Session, topic: str) -> List[int]:
+    """Load the bucket counts for a topic as a dense list indexed by bucket."""
+    histogram = [0] * SCORE_BUCKETS
+    rows = db.query(TopicScoreBucket.bucket, TopicScoreBucket.count)\
+        .filter(TopicScoreBucket.topic == topic)\
+        .all()
+    for bucket, count in rows:
+        if 0 <= bucket < SCORE_BUCKETS:
+            histogram[bucket] = count
+    return histogram
+
+
+def percentile(histogram: List[int], score: float) -> Optional[float]:
+    """
+    Percentage of scores below `score`, counting half of its own bucket.
+    Returns None when the histogram is empty.
+    """
+    total = sum(histogram)
+    if total == 0:
+        return None
+    bucket = score_bucket(score)
+    below = sum(histogram[:bucket])
+    return round(100 * (below + histogram[bucket] / 2) / total, 2)
+
+
+def top_buckets(histogram: List[int], n: int) -> List[dict]:
+    """Highest score buckets that together hold at least the top `n` scores."""
+    result = []
+    seen = 0
+    for bucket in range(SCORE_BUCKETS - 1, -1, -1):
+        count = histogram[bucket]
+        if not count:
+            continue
+        result.append({"score": bucket + MIN_SCORE, "count": count})
+        seen += count
+        if seen >= n:
+            break
+    return result
+
+
+def rebuild_histograms(db: Session):
+    """
+    Recompute every topic histogram exactly from the interviews table.
+
+    The histogram is locked against record_score until the rebuild commits.
+    Interviews committed before the lock are in the aggregate, and later
+    ones wait and then add to the rebuilt counts, so none are lost or
+    counted twice. Concurrent rebuilds from other workers queue behind it.
+    """
+    db.execute(text(f"LOCK TABLE {TopicScoreBucket.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+    bucket = func.least(
+        func.greatest(func.floor(Interview.score), MIN_SCORE), MAX_SCORE
+    ) - MIN_SCORE
+    rows = db.query(Interview.topic, bucket, func.count(Interview.id))\
+        .filter(Interview.topic.isnot(None), Interview.score.isnot(None))\
+        .group_by(Interview.topic, bucket)\
+        .all()
+
+    db.execute(delete(TopicScoreBucket))
+    if rows:
+        db.execute(insert(TopicScoreBucket), [
+            {"topic": topic, "bucket": int(b), "count": count}
+            for topic, b, count in rows
+        ])
+    db.commit()
+
+
+def _rebuild_with_new_session(session_factory):
+    db = session_factory()
+    try:
+        rebuild_histograms(db)
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Histogram rebuild failed: {e}")
+    finally:
+        db.close()
+
+
+async def rebuild_histograms_periodically(session_factory):
+    """Background task that bounds histogram drift with periodic exact rebuilds."""
+    interval = get_settings().histogram_rebuild_interval_seconds
+    while True:
+        # Rebuild first so interviews that predate the table count right after deploy
+        await asyncio.to_thread(_rebuild_with_new_session, session_factory)
+        await asyncio.sleep(interval)
@@ -0,0 +1,235 @@
+"""
+Per-client rate limiting and admission control for expensive endpoints.
+
+Rate limits are token buckets keyed by the authenticated user_id (or the
+client IP for unauthenticated routes). Buckets live in an in-memory store by
+default; set RATE_LIMIT_REDIS_URL to share them across workers.
+
+Admission control caps how many DB-backed requests run at once, so excess
+load is shed with a 503 before the connection pool is exhausted.
+"""
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from pydantic_settings import BaseSettings
+from functools import lru_cache
+
+from auth import get_current_user, TokenData
+
+# Try to import redis for the shared store
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Settings
+class Settings(BaseSettings):
+    rate_limit_enabled: bool = True
+    rate_limit_redis_url: Optional[str] = None
+    # Proxies in front of the app that append to X-Forwarded-For (0 = ignore the header)
+    trusted_proxy_count: int = 0
+    # Default SQLAlchemy pool is 5 connections + 10 overflow
+    max_concurrent_db_requests: int = 12
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"  # Ignore extra fields in .env
+
+@lru_cache()
+def get_settings():
+    return Settings()
+
+settings = get_settings()
+
+
+# ==================== STORES ====================
+
+class RateLimitStore(ABC):
+    """Interface for token bucket storage. `take` returns 0 if allowed, else seconds to wait."""
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        ...
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Token buckets held in this process. Idle buckets are swept once the table grows."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self.buckets = {}  # key -> (tokens, last_refill)
+        self.max_refill_seconds = 0.0
+
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        now = time.monotonic()
+        tokens, last = self.buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * rate)
+
+        if tokens < 1:
+            self.buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+        self.buckets[key] = (tokens - 1, now)
+        self.max_refill_seconds = max(self.max_refill_seconds, capacity / rate)
+        if len(self.buckets) > self.max_keys:
+            self._sweep(now)
+        return 0
+
+    def _sweep(self, now: float):
+        # A bucket that would have refilled completely is the same as no bucket
+        self.buckets = {
+            k: v for k, v in self.buckets.items()
+            if now - v[1] < self.max_refill_seconds
+        }
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """Token buckets shared across workers through Redis, updated atomically by a Lua script."""
+
+    SCRIPT = """
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 't') or ARGV[2])
+    local last = tonumber(redis.call('HGET', KEYS[1], 'l') or ARGV[3])
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    tokens = math.min(capacity, tokens + (now - last) * rate)
+    local wait = 0
+    if tokens < 1 then
+        wait = (1 - tokens) / rate
+    else
+        tokens = tokens - 1
+    end
+    redis.call('HSET', KEYS[1], 't', tokens, 'l', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str):
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        wait = await self.script(keys=[f"ratelimit:{key}"], args=[rate, capacity, time.time()])
+        return float(wait)
+
+
+def create_store() -> RateLimitStore:
+    if settings.rate_limit_redis_url:
+        if REDIS_AVAILABLE:
+            return RedisRateLimitStore(settings.rate_limit_redis_url)
+        print("⚠️ RATE_LIMIT_REDIS_URL set but redis is not installed. Using in-memory rate limits.")
+    return InMemoryRateLimitStore()
+
+store = create_store()
+
+
+# ==================== DEPENDENCIES ====================
+
+def _too_many_requests(retry_after: float):
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Rate limit exceeded",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+def client_ip(request: Request) -> str:
+    """
+    Client IP as seen by the outermost trusted proxy.
+
+    Each proxy appends the address it received the request from, so only the
+    last `trusted_proxy_count` X-Forwarded-For hops can be trusted; anything
+    before them is set by the client and can be spoofed.
+    """
+    peer = request.client.host if request.client else "unknown"
+    if settings.trusted_proxy_count <= 0:
+        return peer
+
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded:
+        return peer
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    if len(hops) < settings.trusted_proxy_count:
+        return peer
+    return hops[-settings.trusted_proxy_count]
+
+
+def limit_per_user(name: str, per_minute: int, burst: int):
+    """Dependency limiting each authenticated user to `per_minute` requests on a route."""
+    rate = per_minute / 60
+
+    async def dependency(current_user: TokenData = Depends(get_current_user)):
+        if not settings.rate_limit_enabled:
+            return
+        retry_after = await store.take(f"{name}:user:{current_user.user_id}", rate, burst)
+        if retry_after:
+            _too_many_requests(retry_after)
+
+    return dependency
+
+
+def limit_per_ip(name: str, per_minute: int, burst: int):
+    """Dependency limiting each client IP to `per_minute` requests on a route."""
+    rate = per_minute / 60
+
+    async def dependency(request: Request):
+        if not settings.rate_limit_enabled:
+            return
+        retry_after = await store.take(f"{name}:ip:{client_ip(request)}", rate, burst)
+        if retry_after:
+            _too_many_requests(retry_after)
+
+    return dependency
+
+
+class ConcurrencyLimiter:
+    """
+    Sheds requests with a 503 once `limit` of them are already in flight.
+
+    Use it as a dependency for ordinary routes. Streaming responses outlive
+    their dependencies, so their handler calls `acquire()` while a 503 can
+    still be sent and hands the release to the response. Releases may come
+    from threadpool-run body generators, hence the lock.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a slot or raise 503. Returns a release function that is safe to call more than once."""
+        with self._lock:
+            if self.in_flight >= self.limit:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server busy, please retry",
+                    headers={"Retry-After": "1"}
+                )
+            self.in_flight += 1
+        released = False
+
+        def release():
+            nonlocal released
+            with self._lock:
+                if released:
+                    return
+                released = True
+                self.in_flight -= 1
+
+        return release
+
+    async def __call__(self):
+        release = self.acquire()
+        try:
+            yield
+        finally:
+            release()
+
+db_admission = ConcurrencyLimiter(settings.max_concurrent_db_requests)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the server modules directly, the same way uvicorn does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
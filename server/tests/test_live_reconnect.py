@@ -0,0 +1,244 @@
+"""
+Reconnect and session resumption in main.run_live_sessions.
+
+A scripted stand-in for `client.aio.live.connect` plays server messages and
+drops connections on a schedule, recording the config each connection was
+opened with and the mic chunks sent on it.
+"""
+
+import asyncio
+import sys
+import time
+import types as pytypes
+
+import pytest
+from google.genai import types
+
+from live_replay import NullPyAudio
+
+# main.py opens PyAudio at import time; give it null devices instead
+sys.modules.setdefault("pyaudio", pytypes.SimpleNamespace(paInt16=NullPyAudio.paInt16, PyAudio=NullPyAudio))
+
+import main
+from latency import LatencyTracer
+
+
+def chunk(n: int) -> dict:
+    return {"data": bytes([n]) * 4, "mime_type": "audio/pcm"}
+
+
+def resumption(handle: str, consumed=None):
+    return types.LiveServerMessage(session_resumption_update=types.LiveServerSessionResumptionUpdate(
+        new_handle=handle, resumable=True, last_consumed_client_message_index=consumed
+    ))
+
+
+def model_says(text: str, audio: bytes = None, turn_complete: bool = False):
+    parts = [types.Part(inline_data=types.Blob(data=audio, mime_type="audio/pcm"))] if audio else None
+    return types.LiveServerMessage(server_content=types.LiveServerContent(
+        model_turn=types.Content(role="model", parts=parts) if parts else None,
+        output_transcription=types.Transcription(text=text) if text else None,
+        turn_complete=turn_complete or None,
+    ))
+
+
+def go_away(time_left: str):
+    return types.LiveServerMessage(go_away=types.LiveServerGoAway(time_left=time_left))
+
+
+class WaitForSent:
+    """Script step: pause until this many mic chunks were sent on the connection."""
+
+    def __init__(self, count: int):
+        self.count = count
+
+
+class Call:
+    """Script step: run a function, e.g. to capture audio while about to drop."""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+
+DROP = object()
+
+
+class FakeSession:
+    def __init__(self, script: list):
+        self.script = script
+        self.sent = []
+        self.done = asyncio.Event()
+
+    async def send_realtime_input(self, audio):
+        self.sent.append(audio)
+
+    async def receive(self):
+        while self.script:
+            step = self.script.pop(0)
+            if step is DROP:
+                raise ConnectionError("connection dropped")
+            if isinstance(step, WaitForSent):
+                while len(self.sent) < step.count:
+                    await asyncio.sleep(0)
+            elif isinstance(step, Call):
+                step.fn()
+            else:
+                yield step
+        self.done.set()
+        await asyncio.Event().wait()
+
+
+class FakeConnection:
+    def __init__(self, client, script):
+        self.client = client
+        self.script = script
+
+    async def __aenter__(self):
+        if self.script is DROP:
+            raise ConnectionError("handle expired")
+        session = FakeSession(list(self.script))
+        self.client.sessions.append(session)
+        return session
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeClient:
+    """client.aio.live.connect that plays one script per connection; DROP fails the connect itself."""
+
+    def __init__(self, *scripts):
+        self.scripts = list(scripts)
+        self.configs = []
+        self.sessions = []
+        self.aio = pytypes.SimpleNamespace(live=pytypes.SimpleNamespace(connect=self.connect))
+
+    def connect(self, model, config):
+        self.configs.append({**config, "session_resumption": dict(config["session_resumption"])})
+        return FakeConnection(self, self.scripts.pop(0))
+
+
+@pytest.fixture
+def voice(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "HISTORY_FILE", str(tmp_path / "history.json"))
+    monkeypatch.setattr(main, "LATENCY_FILE", str(tmp_path / "latency.json"))
+    monkeypatch.setattr(main, "RECONNECT_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(main, "resumption_handle", None)
+    monkeypatch.setattr(main, "dropped_chunks", 0)
+    monkeypatch.setattr(main, "reconnect_gaps", [])
+    monkeypatch.setattr(main, "live_connected", asyncio.Event())
+    monkeypatch.setattr(main, "audio_queue_mic", asyncio.Queue(maxsize=5))
+    monkeypatch.setattr(main, "audio_queue_output", asyncio.Queue())
+    monkeypatch.setattr(main, "latency_tracer", LatencyTracer())
+    main.unacked_audio.clear()
+    main.pending_audio.clear()
+    yield main
+    main.unacked_audio.clear()
+    main.pending_audio.clear()
+
+
+def run_until_done(client, history: list, mic=()):
+    """Run the session loop until the last scripted connection has played out."""
+    async def scenario():
+        for msg in mic:
+            main.audio_queue_mic.put_nowait(msg)
+        task = asyncio.create_task(main.run_live_sessions(client, {}, history))
+        while not (client.sessions and not client.scripts and client.sessions[-1].done.is_set()):
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+
+def test_resume_carries_handle_and_replays_unconsumed_audio_in_order(voice, capsys):
+    client = FakeClient(
+        [
+            WaitForSent(3),
+            # Server state includes chunks 1 and 2 of this connection (index 0 is setup)
+            resumption("h1", consumed=2),
+            Call(lambda: voice.buffer_pending_audio(chunk(3))),
+            DROP,
+        ],
+        [WaitForSent(2), resumption("h2", consumed=2)],
+    )
+
+    run_until_done(client, [], mic=[chunk(0), chunk(1), chunk(2)])
+
+    assert [c["session_resumption"] for c in client.configs] == [
+        {"handle": None, "transparent": True},
+        {"handle": "h1", "transparent": True},
+    ]
+    first, second = client.sessions
+    assert first.sent == [chunk(0), chunk(1), chunk(2)]
+    # Only the chunk the server did not consume, then the one captured while down
+    assert second.sent == [chunk(2), chunk(3)]
+    assert not voice.unacked_audio
+
+    assert len(voice.reconnect_gaps) == 1
+    out = capsys.readouterr().out
+    assert "Resumed after" in out
+    assert "replayed 2 mic chunk(s)" in out
+
+
+def test_expired_handle_starts_fresh_session_with_live_history(voice):
+    history = [{"role": "user", "text": "Tell me about heaps"}]
+    client = FakeClient(
+        [resumption("h1"), model_says("Binary heaps keep the smallest item on top.", turn_complete=True), DROP],
+        DROP,
+        [],
+    )
+
+    run_until_done(client, history)
+
+    handles = [c["session_resumption"]["handle"] for c in client.configs]
+    assert handles == [None, "h1", None]
+    prompt = client.configs[-1]["system_instruction"]
+    assert "Tell me about heaps" in prompt
+    assert "Binary heaps keep the smallest item on top." in prompt
+    assert "Binary heaps" not in client.configs[0]["system_instruction"]
+
+
+def test_go_away_reconnects_after_the_turn_without_cutting_playback(voice, capsys):
+    client = FakeClient(
+        [
+            resumption("h1"),
+            model_says("Sure,", audio=b"a1"),
+            go_away("30s"),
+            model_says(" here it is.", audio=b"a2", turn_complete=True),
+        ],
+        [],
+    )
+
+    run_until_done(client, [])
+
+    assert [c["session_resumption"]["handle"] for c in client.configs] == [None, "h1"]
+    # Both parts of the answer are still queued for the speaker
+    assert [audio for _, audio in voice.audio_queue_output._queue] == [b"a1", b"a2"]
+    out = capsys.readouterr().out
+    assert "reconnecting after this turn" in out
+    assert "Lost connection" not in out
+
+
+def test_drop_mid_turn_abandons_the_broken_turn_for_latency(voice):
+    finished = []
+    voice.latency_tracer = LatencyTracer(on_finish=finished.append)
+    dropped_at = []
+
+    client = FakeClient(
+        [
+            WaitForSent(1),
+            # The model starts answering, then the connection breaks before turn_complete
+            model_says("", audio=b"a0"),
+            Call(lambda: dropped_at.append(time.perf_counter())),
+            DROP,
+        ],
+        [WaitForSent(1), model_says("Hello again.", turn_complete=True)],
+    )
+
+    run_until_done(client, [], mic=[chunk(0)])
+
+    # Only the turn on the new connection is recorded, timed from mic audio sent after the drop
+    assert len(finished) == 1
+    assert finished[0].last_mic_sent > dropped_at[0]
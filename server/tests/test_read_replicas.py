@@ -0,0 +1,124 @@
+"""
+Read-replica routing against two local database instances.
+
+Two SQLite files stand in for the primary and the replica. Each holds a
+one-row `instance` table naming itself, so a test can see which database a
+session actually reads from.
+"""
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import database
+
+
+def make_instance(path, name: str) -> str:
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE instance (name TEXT)"))
+        conn.execute(text("INSERT INTO instance VALUES (:name)"), {"name": name})
+    engine.dispose()
+    return url
+
+
+def read_instance(session_factory) -> str:
+    db = session_factory()
+    try:
+        return db.execute(text("SELECT name FROM instance")).scalar()
+    finally:
+        db.close()
+
+
+def set_lag(lag: float):
+    """Record a fresh lag measurement so the cached value is used instead of a live check."""
+    for replica in database.replicas:
+        replica[2] = lag
+        replica[3] = time.monotonic()
+
+
+@pytest.fixture
+def instances(tmp_path, monkeypatch):
+    primary_url = make_instance(tmp_path / "primary.db", "primary")
+    replica_url = make_instance(tmp_path / "replica.db", "replica")
+
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=create_engine(primary_url)))
+    monkeypatch.setattr(database, "db_available", True)
+    monkeypatch.setattr(database, "_primary_pins", {})
+    monkeypatch.setattr(database.settings, "replica_max_lag_seconds", 5.0)
+    monkeypatch.setattr(database.settings, "replica_lag_check_seconds", 60.0)
+    monkeypatch.setattr(database.settings, "read_your_writes_seconds", 10.0)
+    database.configure_replicas(replica_url)
+    yield
+    database.configure_replicas("")
+
+
+def test_reads_go_to_replica_within_lag_budget(instances):
+    set_lag(0.5)
+    assert read_instance(database.read_session_factory("user-1")) == "replica"
+
+
+def test_lagging_replica_falls_back_to_primary(instances):
+    set_lag(30.0)
+    assert read_instance(database.read_session_factory("user-1")) == "primary"
+
+
+def test_failed_lag_check_falls_back_to_primary(instances, monkeypatch):
+    # SQLite has no pg_last_wal_* functions, so a live check fails like an unreachable replica
+    monkeypatch.setattr(database.settings, "replica_lag_check_seconds", 0.0)
+    assert read_instance(database.read_session_factory("user-1")) == "primary"
+    assert database.replicas[0][2] == float("inf")
+
+
+def test_pinned_user_reads_from_primary_until_pin_expires(instances, monkeypatch):
+    set_lag(0.5)
+    database.pin_user_to_primary("writer")
+
+    assert read_instance(database.read_session_factory("writer")) == "primary"
+    assert read_instance(database.read_session_factory("someone-else")) == "replica"
+
+    database._primary_pins["writer"] = time.monotonic() - 1
+    assert read_instance(database.read_session_factory("writer")) == "replica"
+
+
+def test_read_dependency_uses_routed_session(instances):
+    set_lag(0.5)
+    dependency = database.get_read_db_for("user-1")
+    db = next(dependency)
+    assert db.execute(text("SELECT name FROM instance")).scalar() == "replica"
+    dependency.close()
+
+
+def test_read_dependency_yields_none_without_database(monkeypatch):
+    monkeypatch.setattr(database, "db_available", False)
+    assert next(database.get_read_db_for("user-1")) is None
+
+
+def test_no_replicas_reads_from_primary(instances):
+    database.configure_replicas("")
+    assert database.read_session_factory("user-1") is database.SessionLocal
+
+
+def replica_status(monkeypatch, caught_up, replay_age):
+    """Stand in for the PostgreSQL LSN queries, which SQLite can't run."""
+    monkeypatch.setattr(database.settings, "replica_lag_check_seconds", 0.0)
+    monkeypatch.setattr(database, "_primary_wal_lsn", lambda: "0/3000060")
+    monkeypatch.setattr(database, "_replica_replay_status", lambda engine, lsn: (caught_up, replay_age))
+
+
+def test_replica_with_receiver_down_falls_back_to_primary(instances, monkeypatch):
+    # The replica replayed all it received before its WAL receiver stopped, but the
+    # primary has moved on since: it is behind by the age of its last replayed transaction
+    replica_status(monkeypatch, caught_up=False, replay_age=120.0)
+    assert read_instance(database.read_session_factory("user-1")) == "primary"
+    assert database.replicas[0][2] == 120.0
+
+
+def test_idle_replica_at_primary_position_is_current(instances, monkeypatch):
+    # No writes for an hour: the last replayed transaction is old but nothing is missing
+    replica_status(monkeypatch, caught_up=True, replay_age=3600.0)
+    assert read_instance(database.read_session_factory("user-1")) == "replica"
+    assert database.replicas[0][2] == 0.0